@@ -0,0 +1,112 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=invalid-name
+
+"""Listing page decoding benchmark.
+
+Decodes a ListDocuments page the way a pooled qbusiness client does:
+botocore parses the HTTP body against the service model, then the page
+is validated into DocumentDetailsResponse. Reports items per second for
+each stage in strict and fast decode modes. Runs offline.
+"""
+
+import json
+import time
+import timeit
+import argparse
+
+import botocore.session
+from botocore.parsers import ResponseParserFactory
+from rich.console import Console
+from rich.table import Table
+
+from qbapi_tools.datamodel import DecodeModeEnum, DocumentDetailsResponse
+from qbapi_tools.decoding import response_parser_factory
+
+
+def build_response(documents: int) -> dict:
+    """HTTP response of a ListDocuments page"""
+    now = time.time()
+    body = {
+        "nextToken": "bench-next-token",
+        "documentDetailList": [{
+            "documentId": f"s3://bench-bucket/docs/document-{idx:07d}.pdf",
+            "status": "INDEXED" if idx % 10 else "FAILED",
+            "createdAt": now - idx,
+            "updatedAt": now,
+            "error": {"errorCode": "400", "errorMessage": "Unsupported format"}
+            if idx % 10 == 0 else {},
+        } for idx in range(documents)],
+    }
+    return {"status_code": 200, "headers": {}, "body": json.dumps(body).encode("utf-8")}
+
+
+def items_per_sec(func, documents: int, pages: int, repeat: int) -> float:
+    """Best of `repeat` runs, in items per second"""
+    best = min(timeit.repeat(func, number=pages, repeat=repeat))
+    return documents * pages / best
+
+
+def run_mode(decode_mode: DecodeModeEnum, response: dict, documents: int,
+             pages: int, repeat: int) -> dict:
+    """Time parsing and validation of a page in a decode mode"""
+    service_model = botocore.session.get_session().get_service_model("qbusiness")
+    output_shape = service_model.operation_model("ListDocuments").output_shape
+    factory = response_parser_factory(decode_mode) or ResponseParserFactory()
+    parser = factory.create_parser(service_model.protocol)
+    parsed = parser.parse(response, output_shape)
+    return {
+        "mode": decode_mode.value,
+        "parse": items_per_sec(
+            lambda: parser.parse(response, output_shape), documents, pages, repeat
+        ),
+        "validate": items_per_sec(
+            lambda: DocumentDetailsResponse(**parsed), documents, pages, repeat
+        ),
+        "total": items_per_sec(
+            lambda: DocumentDetailsResponse(**parser.parse(response, output_shape)),
+            documents, pages, repeat
+        ),
+    }
+
+
+def print_report(results: list[dict], documents: int) -> None:
+    """Render results as a table"""
+    table = Table(title=f"ListDocuments page decoding, {documents} documents (items/s)")
+    for column in ("mode", "botocore parse", "pydantic validate", "total"):
+        table.add_column(column, justify="left" if column == "mode" else "right")
+    for result in results:
+        table.add_row(
+            result["mode"],
+            *[f"{result[stage]:,.0f}" for stage in ("parse", "validate", "total")]
+        )
+    Console().print(table)
+
+
+def main():
+    """Parse arguments and run benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--documents", type=int, default=1000,
+                        help="documents per page")
+    parser.add_argument("--pages", type=int, default=20,
+                        help="pages decoded per timed run")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="timed runs per stage, best is reported")
+    parser.add_argument("--json", dest="json_path",
+                        help="also write results to a JSON file")
+    args = parser.parse_args()
+
+    response = build_response(args.documents)
+    results = [
+        run_mode(decode_mode, response, args.documents, args.pages, args.repeat)
+        for decode_mode in (DecodeModeEnum.strict, DecodeModeEnum.fast)
+    ]
+    print_report(results, args.documents)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as json_file:
+            json.dump(results, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
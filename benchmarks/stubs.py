@@ -0,0 +1,168 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=invalid-name
+
+"""Local stand-in endpoints for the identity provider, SSO-OIDC and STS"""
+
+import json
+import time
+import random
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlsplit
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+SIGNING_KEY_ID = "bench-key-1"
+
+
+class Latency:
+    """Injected response latency with uniform jitter"""
+    def __init__(self, millis: float = 0, jitter_millis: float = 0) -> None:
+        self.millis = millis
+        self.jitter_millis = jitter_millis
+
+    def sleep(self) -> None:
+        """Delay the current response"""
+        delay = self.millis + random.uniform(0, self.jitter_millis)  # nosec
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+
+class _StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, handler, latency: Latency, signing_key) -> None:
+        super().__init__(("127.0.0.1", 0), handler)
+        self.latency = latency
+        self.signing_key = signing_key
+
+    @property
+    def base_url(self) -> str:
+        """Server url"""
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def start(self) -> "_StubServer":
+        """Serve requests on a background thread"""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: _StubServer
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        pass
+
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+    def _send(self, status: int, body: bytes, content_type: str) -> None:
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, payload: dict, status: int = 200) -> None:
+        self._send(status, json.dumps(payload).encode("utf-8"), "application/json")
+
+    def _sign(self, claims: dict) -> str:
+        now = int(time.time())
+        return jwt.encode(
+            {"iat": now, "exp": now + 3600, **claims},
+            self.server.signing_key,
+            algorithm="RS256",
+            headers={"kid": SIGNING_KEY_ID}
+        )
+
+
+class IdpHandler(_StubHandler):
+    """OIDC discovery, JWKS and token endpoints issuing RS256 tokens"""
+    def do_GET(self) -> None:
+        path = urlsplit(self.path).path
+        if path == "/.well-known/openid-configuration":
+            base_url = self.server.base_url
+            self._send_json({
+                "issuer": base_url,
+                "authorization_endpoint": f"{base_url}/authorize",
+                "token_endpoint": f"{base_url}/token",
+                "userinfo_endpoint": f"{base_url}/userinfo",
+                "jwks_uri": f"{base_url}/jwks",
+            })
+        elif path == "/jwks":
+            jwk = json.loads(jwt.algorithms.RSAAlgorithm.to_jwk(
+                self.server.signing_key.public_key()
+            ))
+            jwk.update({"kid": SIGNING_KEY_ID, "use": "sig", "alg": "RS256"})
+            self._send_json({"keys": [jwk]})
+        else:
+            self._send_json({"error": "not_found"}, 404)
+
+    def do_POST(self) -> None:
+        form = parse_qs(self._body().decode("utf-8"))
+        self.server.latency.sleep()
+        user = form.get("code", ["bench-user"])[0]
+        self._send_json({
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "access_token": f"access-{user}",
+            "id_token": self._sign({
+                "iss": self.server.base_url,
+                "aud": "bench-client",
+                "sub": user,
+                "email": f"{user}@example.com",
+            }),
+        })
+
+
+class AwsHandler(_StubHandler):
+    """SSO-OIDC CreateTokenWithIAM and STS AssumeRole responses"""
+    def do_POST(self) -> None:
+        body = self._body()
+        self.server.latency.sleep()
+        if urlsplit(self.path).path == "/token":
+            request = json.loads(body or b"{}")
+            user = jwt.decode(
+                request.get("assertion", ""),
+                options={"verify_signature": False}
+            ).get("sub", "bench-user")
+            self._send_json({
+                "accessToken": f"idc-access-{user}",
+                "tokenType": "Bearer",
+                "expiresIn": 3600,
+                "idToken": self._sign({"sub": user, "sts:identity_context": f"context-{user}"}),
+                "issuedTokenType": "urn:ietf:params:oauth:token-type:access_token",
+            })
+            return
+        expiration = (datetime.now(timezone.utc) + timedelta(hours=1)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._send(200, f"""<AssumeRoleResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+  <AssumeRoleResult>
+    <Credentials>
+      <AccessKeyId>ASIABENCHMARK</AccessKeyId>
+      <SecretAccessKey>bench-secret</SecretAccessKey>
+      <SessionToken>bench-session-token</SessionToken>
+      <Expiration>{expiration}</Expiration>
+    </Credentials>
+    <AssumedRoleUser>
+      <AssumedRoleId>AROABENCHMARK:bench</AssumedRoleId>
+      <Arn>arn:aws:sts::111122223333:assumed-role/bench/bench</Arn>
+    </AssumedRoleUser>
+  </AssumeRoleResult>
+  <ResponseMetadata><RequestId>bench</RequestId></ResponseMetadata>
+</AssumeRoleResponse>""".encode("utf-8"), "text/xml")
+
+
+def start_stubs(idp_latency: Optional[Latency] = None,
+                aws_latency: Optional[Latency] = None) -> tuple[_StubServer, _StubServer]:
+    """Start stub identity provider and AWS endpoints"""
+    signing_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    idp = _StubServer(IdpHandler, idp_latency or Latency(), signing_key).start()
+    aws = _StubServer(AwsHandler, aws_latency or Latency(), signing_key).start()
+    return idp, aws
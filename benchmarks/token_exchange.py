@@ -0,0 +1,171 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=invalid-name
+
+"""Token exchange benchmark against local stub endpoints.
+
+Runs the webapp login exchange (get_oidc_config -> get_oidc_id_token ->
+get_idc_sts_id_context -> get_sts_credential) at increasing concurrency
+and reports p50/p95/p99 latency per step and logins per second.
+Runs offline: identity provider, SSO-OIDC and STS are local stand-ins.
+"""
+
+import os
+import json
+import time
+import argparse
+import tempfile
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+
+from rich.console import Console
+from rich.table import Table
+
+from stubs import Latency, start_stubs
+
+STEPS = ("oidc_config", "id_token", "idc_context", "sts_credential", "login")
+REGION_NAME = "us-east-1"
+
+
+def _configure_aws_env(aws_url: str) -> None:
+    """Point sso-oidc/STS clients at the stub and use dummy credentials"""
+    os.environ.update({
+        "AWS_ACCESS_KEY_ID": "bench",
+        "AWS_SECRET_ACCESS_KEY": "bench",
+        "AWS_SESSION_TOKEN": "bench",
+        "AWS_ENDPOINT_URL_SSO_OIDC": aws_url,
+        "AWS_ENDPOINT_URL_STS": aws_url,
+        "qbapi_cache_dir": tempfile.mkdtemp(prefix="qbapi-bench-"),
+    })
+
+
+def percentile(samples: list[float], pct: int) -> float:
+    """Inclusive percentile of samples"""
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+
+def login(issuer_url: str, user: str, verify: bool) -> dict[str, float]:
+    """Run one login exchange and time each step in milliseconds"""
+    # pylint: disable=import-outside-toplevel
+    from qbapi_tools.access_helpers import (
+        get_cached_oidc_config,
+        get_oidc_id_token,
+        get_idc_sts_id_context,
+        get_sts_credential,
+    )
+    timings = {}
+    started = time.perf_counter()
+
+    mark = time.perf_counter()
+    oidc_config = get_cached_oidc_config(issuer_url)
+    timings["oidc_config"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    oidc_data = get_oidc_id_token(
+        base_url="http://localhost/authorization-code/callback",
+        code=user,
+        token_uri=oidc_config["token_endpoint"],
+        client_id="bench-client",
+        client_secret="bench-secret",
+        issuer_url=issuer_url if verify else None
+    )
+    timings["id_token"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    sts_context = get_idc_sts_id_context(
+        "arn:aws:sso::111122223333:application/ssoins-bench/apl-bench",
+        oidc_data.id_token,
+        REGION_NAME
+    )
+    timings["idc_context"] = time.perf_counter() - mark
+
+    mark = time.perf_counter()
+    get_sts_credential(
+        "arn:aws:iam::111122223333:role/bench", sts_context, REGION_NAME
+    )
+    timings["sts_credential"] = time.perf_counter() - mark
+
+    timings["login"] = time.perf_counter() - started
+    return {step: secs * 1000 for step, secs in timings.items()}
+
+
+def run_level(issuer_url: str, concurrency: int, logins: int, verify: bool) -> dict:
+    """Run logins at a concurrency level and summarize timings"""
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        started = time.perf_counter()
+        results = list(executor.map(
+            lambda idx: login(issuer_url, f"user-{idx}", verify),
+            range(logins)
+        ))
+        elapsed = time.perf_counter() - started
+    summary = {"concurrency": concurrency, "logins": logins,
+               "logins_per_sec": logins / elapsed, "steps": {}}
+    for step in STEPS:
+        samples = [result[step] for result in results]
+        summary["steps"][step] = {
+            "p50": percentile(samples, 50),
+            "p95": percentile(samples, 95),
+            "p99": percentile(samples, 99),
+        }
+    return summary
+
+
+def print_report(summaries: list[dict]) -> None:
+    """Render summaries as a table"""
+    table = Table(title="Token exchange latency (ms)")
+    for column in ("users", "logins/s", "step", "p50", "p95", "p99"):
+        table.add_column(column, justify="left" if column == "step" else "right")
+    for summary in summaries:
+        for idx, step in enumerate(STEPS):
+            stats = summary["steps"][step]
+            table.add_row(
+                str(summary["concurrency"]) if idx == 0 else "",
+                f"{summary['logins_per_sec']:.1f}" if idx == 0 else "",
+                step,
+                *[f"{stats[pct]:.1f}" for pct in ("p50", "p95", "p99")],
+                end_section=idx == len(STEPS) - 1
+            )
+    Console().print(table)
+
+
+def main():
+    """Parse arguments and run benchmark"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--max-users", type=int, default=32,
+                        help="highest concurrency level, levels double from 1")
+    parser.add_argument("--logins", type=int, default=200,
+                        help="logins per concurrency level")
+    parser.add_argument("--idp-latency-ms", type=float, default=20)
+    parser.add_argument("--aws-latency-ms", type=float, default=30)
+    parser.add_argument("--jitter-ms", type=float, default=10)
+    parser.add_argument("--verify", action="store_true",
+                        help="verify identity token signatures using JWKS")
+    parser.add_argument("--json", dest="json_path",
+                        help="also write results to a JSON file")
+    args = parser.parse_args()
+
+    idp, aws = start_stubs(
+        Latency(args.idp_latency_ms, args.jitter_ms),
+        Latency(args.aws_latency_ms, args.jitter_ms)
+    )
+    _configure_aws_env(aws.base_url)
+
+    # Warm caches and clients once, as a running webapp would be
+    login(idp.base_url, "warm-up", args.verify)
+
+    summaries = []
+    concurrency = 1
+    while concurrency <= args.max_users:
+        summaries.append(run_level(idp.base_url, concurrency, args.logins, args.verify))
+        concurrency *= 2
+    print_report(summaries)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as json_file:
+            json.dump(summaries, json_file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -73,6 +73,20 @@ def print_index_ids_as_list_4_app(app_id: str):
     logger.debug(pretty_repr(idx_ids))
 
 
+def print_retrievers_4_app(app_id: str):
+    """Prints retrievers for an app, used by relevant content search"""
+    logger.info(
+        "\n[bold][u]Use Case: print retrievers for an app[/]",
+        extra={"markup": True}
+    )
+    logger.debug(f"Application ID: {app_id}")
+    q_api_helper = QBusinessAPIHelpers(
+        service_config=ServiceConfig()
+    )
+    for retriever in q_api_helper.list_retrievers(app_id=app_id):
+        logger.debug(pretty_repr(retriever))
+
+
 def print_all_ds_info_4_app(app_id: str):
     """Prints all data sources for an app"""
     logger.info(
@@ -106,23 +120,10 @@ def print_ds_id_list_by_ds_type_4_app(app_id: str, ds_type: DataSourceEnum):
     q_api_helper = QBusinessAPIHelpers(
         service_config=ServiceConfig()
     )
-    idx_iter = q_api_helper.list_indices(
-        app_id=app_id
-    )
-    for idx in idx_iter:
-        logger.debug(f"Index ID: {idx.indexId}")
-        ds_iter = q_api_helper.list_data_sources(
-            app_id=app_id,
-            index_id=idx.indexId
-        )
-        # Filer by DS Type, then map only datasource id and convert to list
-        ds_ids = list(
-            map(
-                lambda ds: ds.dataSourceId,
-                filter(lambda ds: ds.type==ds_type, ds_iter)  # noqa: E225
-            )
-        )
-        logger.debug(pretty_repr(ds_ids))
+    # Topology (indices and data sources) is cached, repeated lookups are free
+    topology = q_api_helper.get_topology(app_id=app_id)
+    ds_ids = topology.data_sources_by_type(ds_type)
+    logger.debug(pretty_repr(ds_ids))
 
 
 def print_all_indexed_docs_4_app(app_id: str):
@@ -179,6 +180,7 @@ def main():
     if app_id:
         print_index_ids_as_list_4_app(app_id)
         # print_all_ds_info_4_app(app_id)
+        # print_retrievers_4_app(app_id)
 
         # print_ds_id_list_by_ds_type_4_app(app_id, DataSourceEnum.s3)
         # print_ds_id_list_by_ds_type_4_app(app_id, DataSourceEnum.confluence)
@@ -6,47 +6,52 @@
 """Token exchange helper"""
 
 import os
+import time
+import asyncio
 import random
 import string
-import logging
-from typing import Optional
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Optional
 
-import boto3
 import jwt
 import requests
-from rich.logging import RichHandler
-from rich.pretty import pretty_repr
 from pydantic import BaseModel
 
 from qbapi_tools.exception import (
     AccessHelperException,
 )
+from qbapi_tools.http_pool import get_http_pool
+from qbapi_tools.client_pool import get_client_cache
+from qbapi_tools.jwks import get_jwks_cache
+from qbapi_tools.log_config import LazyRepr, get_logger
+from qbapi_tools.tracing import traced
 
-logger = logging.getLogger("qbapi_tools")
-logger.addHandler(RichHandler(show_time=False, rich_tracebacks=False))
-logger.setLevel(logging.getLevelName(os.environ.get('logging', 'DEBUG')))
+logger = get_logger()
+
+OIDC_CONFIG_CACHE_DIR = Path(os.environ.get(
+    'qbapi_cache_dir',
+    Path.home() / ".cache" / "qbapi_tools"
+))
+OIDC_CONFIG_DEFAULT_TTL = 3600
+OIDC_CONFIG_MAX_TTL = 86400
+TOKEN_EXCHANGE_SERVICES = ("sso-oidc", "sts")
+# Concurrent async token exchange steps, further logins queue for a worker
+TOKEN_EXCHANGE_MAX_WORKERS = 128
 
 
 class OidcData(BaseModel):
     """OIDC OAuth data"""
     id_token: Optional[str] = None
     access_token: Optional[str] = None
+    refresh_token: Optional[str] = None
     jwt_email: Optional[str] = None
     jwt_sub: Optional[str] = None
 
 
-def get_oidc_config(issuer_url: str, timeout: int = 10) -> dict:
-    """Retrieve OIDC configuration using issuer url"""
-    headers = {'Accept': 'application/json'}
-    resp = requests.get(
-        f"{issuer_url}/.well-known/openid-configuration",
-        headers=headers,
-        timeout=timeout
-    )
-    if resp.status_code != 200:
-        raise AccessHelperException("Unable to retrieve OIDC Configuration")
-
-    oidc_config = resp.json()
+def _validate_oidc_config(oidc_config: dict) -> dict:
     endpoints = (
         "issuer",
         "authorization_endpoint",
@@ -58,33 +63,276 @@ def get_oidc_config(issuer_url: str, timeout: int = 10) -> dict:
     return oidc_config
 
 
-def get_oidc_id_token(base_url: str, code: str, token_uri: str, client_id: str,
-                      client_secret: str, timeout: int = 120) -> OidcData:
-    """Obtain OIDC access and identity token"""
+@traced("idp.oidc_config")
+def get_oidc_config(issuer_url: str, timeout: Optional[float] = None) -> dict:
+    """Retrieve OIDC configuration using issuer url"""
+    headers = {'Accept': 'application/json'}
+    resp = get_http_pool().request(
+        "GET",
+        f"{issuer_url}/.well-known/openid-configuration",
+        headers=headers,
+        timeout=timeout
+    )
+    if resp.status_code != 200:
+        raise AccessHelperException("Unable to retrieve OIDC Configuration")
+    return _validate_oidc_config(resp.json())
+
+
+class OidcConfigCacheEntry(BaseModel):
+    """Cached OIDC discovery document with HTTP validators"""
+    issuer_url: str
+    oidc_config: dict
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    fetched_at: float
+    expires_at: float
+    persist: bool = True
+
+    def ttl(self, now: Optional[float] = None) -> float:
+        """Seconds left until the entry expires (negative when stale)"""
+        return self.expires_at - (now if now is not None else time.time())
+
+
+class OidcConfigCache:
+    """Memory and disk backed OIDC discovery document cache.
+
+    Honors Cache-Control max-age/no-cache/no-store, revalidates with
+    ETag/Last-Modified and refreshes in the background before expiry.
+    Stale entries are served while a background revalidation runs, so a
+    slow or unavailable IdP does not block callers once a copy exists.
+    """
+    def __init__(self, cache_dir: Optional[str | Path] = None,
+                 default_ttl: float = OIDC_CONFIG_DEFAULT_TTL,
+                 max_ttl: float = OIDC_CONFIG_MAX_TTL,
+                 max_stale: float = OIDC_CONFIG_MAX_TTL,
+                 refresh_ahead: float = 0.2,
+                 timeout: Optional[float] = None) -> None:
+        self.cache_dir = Path(cache_dir) if cache_dir else OIDC_CONFIG_CACHE_DIR
+        self.default_ttl = default_ttl
+        self.max_ttl = max_ttl
+        self.max_stale = max_stale
+        self.refresh_ahead = refresh_ahead
+        self.timeout = timeout
+        self._entries: dict[str, OidcConfigCacheEntry] = {}
+        self._refreshing: set[str] = set()
+        self._lock = threading.Lock()
+
+    def get(self, issuer_url: str) -> dict:
+        """Return OIDC configuration, fetching from the IdP only when needed"""
+        issuer_url = issuer_url.rstrip("/")
+        entry = self._load(issuer_url)
+        if not entry:
+            return self._refresh(issuer_url, None).oidc_config
+
+        ttl = entry.ttl()
+        if ttl > 0:
+            lifetime = entry.expires_at - entry.fetched_at
+            if ttl <= lifetime * self.refresh_ahead:
+                self._refresh_in_background(issuer_url, entry)
+        elif -ttl <= self.max_stale:
+            self._refresh_in_background(issuer_url, entry)
+        else:
+            try:
+                entry = self._refresh(issuer_url, entry)
+            except (AccessHelperException, requests.RequestException) as ex:
+                logger.warning(f"Serving stale OIDC configuration for '{issuer_url}': {ex}")
+        return entry.oidc_config
+
+    def invalidate(self, issuer_url: str) -> None:
+        """Drop memory and disk copies for an issuer"""
+        issuer_url = issuer_url.rstrip("/")
+        with self._lock:
+            self._entries.pop(issuer_url, None)
+        self._cache_file(issuer_url).unlink(missing_ok=True)
+
+    def _cache_file(self, issuer_url: str) -> Path:
+        digest = hashlib.sha256(issuer_url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"oidc-{digest}.json"
+
+    def _load(self, issuer_url: str) -> Optional[OidcConfigCacheEntry]:
+        with self._lock:
+            entry = self._entries.get(issuer_url)
+        if entry:
+            return entry
+        cache_file = self._cache_file(issuer_url)
+        try:
+            entry = OidcConfigCacheEntry.model_validate_json(cache_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as ex:
+            logger.warning(f"Ignoring unreadable OIDC cache file '{cache_file}': {ex}")
+            return None
+        if entry.issuer_url != issuer_url:
+            return None
+        with self._lock:
+            self._entries.setdefault(issuer_url, entry)
+            return self._entries[issuer_url]
+
+    def _store(self, entry: OidcConfigCacheEntry) -> None:
+        with self._lock:
+            self._entries[entry.issuer_url] = entry
+        if not entry.persist:
+            return
+        cache_file = self._cache_file(entry.issuer_url)
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+            tmp_file.write_text(entry.model_dump_json(), encoding="utf-8")
+            os.replace(tmp_file, cache_file)
+        except OSError as ex:
+            logger.warning(f"Unable to persist OIDC cache file '{cache_file}': {ex}")
+
+    def _max_age(self, resp: requests.Response) -> tuple[float, bool]:
+        """Parse Cache-Control into (ttl, persist)"""
+        directives = {}
+        for directive in resp.headers.get("Cache-Control", "").split(","):
+            name, _, value = directive.strip().partition("=")
+            if name:
+                directives[name.lower()] = value.strip('"')
+        persist = "no-store" not in directives
+        if "no-cache" in directives or "no-store" in directives:
+            return 0, persist
+        ttl = self.default_ttl
+        if "max-age" in directives:
+            try:
+                ttl = float(directives["max-age"]) - float(resp.headers.get("Age", 0))
+            except ValueError:
+                ttl = self.default_ttl
+        return min(max(ttl, 0), self.max_ttl), persist
+
+    @traced("idp.oidc_config")
+    def _refresh(self, issuer_url: str,
+                 entry: Optional[OidcConfigCacheEntry]) -> OidcConfigCacheEntry:
+        headers = {'Accept': 'application/json'}
+        if entry and entry.etag:
+            headers['If-None-Match'] = entry.etag
+        if entry and entry.last_modified:
+            headers['If-Modified-Since'] = entry.last_modified
+        resp = get_http_pool().request(
+            "GET",
+            f"{issuer_url}/.well-known/openid-configuration",
+            headers=headers,
+            timeout=self.timeout
+        )
+        now = time.time()
+        ttl, persist = self._max_age(resp)
+        if resp.status_code == 304 and entry:
+            entry = entry.model_copy(update={
+                "etag": resp.headers.get("ETag", entry.etag),
+                "fetched_at": now,
+                "expires_at": now + ttl,
+                "persist": persist,
+            })
+        elif resp.status_code == 200:
+            entry = OidcConfigCacheEntry(
+                issuer_url=issuer_url,
+                oidc_config=_validate_oidc_config(resp.json()),
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"),
+                fetched_at=now,
+                expires_at=now + ttl,
+                persist=persist,
+            )
+        else:
+            raise AccessHelperException("Unable to retrieve OIDC Configuration")
+        self._store(entry)
+        return entry
+
+    def _refresh_in_background(self, issuer_url: str,
+                               entry: OidcConfigCacheEntry) -> None:
+        with self._lock:
+            if issuer_url in self._refreshing:
+                return
+            self._refreshing.add(issuer_url)
+
+        def _run():
+            try:
+                self._refresh(issuer_url, entry)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                logger.warning(
+                    f"Background OIDC configuration refresh failed for '{issuer_url}': {ex}"
+                )
+            finally:
+                with self._lock:
+                    self._refreshing.discard(issuer_url)
+
+        threading.Thread(
+            target=_run, name="oidc-config-refresh", daemon=True
+        ).start()
+
+
+_oidc_config_cache: Optional[OidcConfigCache] = None
+_oidc_config_cache_lock = threading.Lock()
+
+
+def get_cached_oidc_config(issuer_url: str) -> dict:
+    """Retrieve OIDC configuration through the shared discovery cache"""
+    global _oidc_config_cache  # pylint: disable=global-statement
+    if _oidc_config_cache is None:
+        with _oidc_config_cache_lock:
+            if _oidc_config_cache is None:
+                _oidc_config_cache = OidcConfigCache()
+    return _oidc_config_cache.get(issuer_url)
+
+
+def configure_oidc_config_cache(oidc_config_cache: OidcConfigCache) -> OidcConfigCache:
+    """Replace the shared discovery cache, for example to change its folder"""
+    global _oidc_config_cache  # pylint: disable=global-statement
+    with _oidc_config_cache_lock:
+        _oidc_config_cache = oidc_config_cache
+    return _oidc_config_cache
+
+
+@traced("idp.verify_id_token")
+def verify_oidc_id_token(id_token: str, issuer_url: str, audience: str,
+                         leeway: float = 60) -> dict:
+    """Verify OIDC identity token signature and claims using cached JWKS"""
+    oidc_config = get_cached_oidc_config(issuer_url)
+    jwks_uri = oidc_config.get("jwks_uri")
+    if not jwks_uri:
+        raise AccessHelperException("OIDC Configuration missing 'jwks_uri'.")
+    try:
+        header = jwt.get_unverified_header(id_token)
+        signing_key = get_jwks_cache(jwks_uri).get_signing_key(header.get("kid"))
+        return jwt.decode(
+            id_token,
+            key=signing_key.key,
+            algorithms=[signing_key.algorithm_name],
+            audience=audience,
+            issuer=oidc_config["issuer"],
+            leeway=leeway,
+            options={"require": ["exp", "iat", "iss", "aud", "sub"]}
+        )
+    except jwt.PyJWTError as ex:
+        raise AccessHelperException(f"Invalid OIDC identity token: {ex}") from ex
+
+
+def _request_oidc_tokens(token_uri: str, query_params: dict, client_id: str,
+                         client_secret: str, timeout: Optional[float] = None,
+                         issuer_url: Optional[str] = None) -> OidcData:
     headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-    query_params = {
-        'grant_type': 'authorization_code',
-        'code': code,
-        'redirect_uri': base_url
-    }
-    exchange = requests.post(
+    exchange = get_http_pool().request(
+        "POST",
         token_uri,
         headers=headers,
         data=requests.compat.urlencode(query_params),
         auth=(client_id, client_secret),
         timeout=timeout
     ).json()
-    logger.debug(f"Get token response:\n{pretty_repr(exchange)}")
+    logger.debug("Get token response:\n%s", LazyRepr(exchange))
 
     id_token = exchange.get("id_token")
     if not id_token:
         raise AccessHelperException("Missing OIDC identity token.")
-    oidc_id_jwt = jwt.decode(
-        id_token,
-        algorithms=["RS256"],
-        options={"verify_signature": False}
-    )
-    logger.info(f"OIDC identity token:\n{pretty_repr(oidc_id_jwt)}")
+    if issuer_url:
+        oidc_id_jwt = verify_oidc_id_token(id_token, issuer_url, client_id)
+    else:
+        oidc_id_jwt = jwt.decode(
+            id_token,
+            algorithms=["RS256"],
+            options={"verify_signature": False}
+        )
+    logger.debug("OIDC identity token:\n%s", LazyRepr(oidc_id_jwt))
 
     token_type = exchange.get("token_type", "")
     if not token_type:
@@ -101,21 +349,59 @@ def get_oidc_id_token(base_url: str, code: str, token_uri: str, client_id: str,
     return OidcData(
         id_token=id_token,
         access_token=access_token,
+        refresh_token=exchange.get("refresh_token"),
         jwt_sub=oidc_id_jwt.get("sub"),
         jwt_email=oidc_id_jwt.get("email"),
     )
 
 
+@traced("login.id_token", step=2)
+def get_oidc_id_token(base_url: str, code: str, token_uri: str, client_id: str,
+                      client_secret: str, timeout: Optional[float] = None,
+                      issuer_url: Optional[str] = None) -> OidcData:
+    """Obtain OIDC access and identity token.
+    Identity token signature is verified when issuer url is provided."""
+    query_params = {
+        'grant_type': 'authorization_code',
+        'code': code,
+        'redirect_uri': base_url
+    }
+    return _request_oidc_tokens(
+        token_uri, query_params, client_id, client_secret, timeout, issuer_url
+    )
+
+
+@traced("login.refresh_id_token", step=2)
+def refresh_oidc_id_token(refresh_token: str, token_uri: str, client_id: str,
+                          client_secret: str, timeout: Optional[float] = None,
+                          issuer_url: Optional[str] = None) -> OidcData:
+    """Obtain fresh OIDC access and identity token using a refresh token.
+    Identity token signature is verified when issuer url is provided."""
+    query_params = {
+        'grant_type': 'refresh_token',
+        'refresh_token': refresh_token
+    }
+    oidc_data = _request_oidc_tokens(
+        token_uri, query_params, client_id, client_secret, timeout, issuer_url
+    )
+    if not oidc_data.refresh_token:
+        # Refresh token is not rotated by all providers
+        oidc_data.refresh_token = refresh_token
+    return oidc_data
+
+
+@traced("idp.user_info")
 def get_oidc_user_info(userinfo_uri: str, access_token: str,
-                       timeout: int = 120) -> tuple[str, str, str]:
+                       timeout: Optional[float] = None) -> tuple[str, str, str]:
     """Retrieve user info from identity provider (IdP)"""
     headers = {'Authorization': f'Bearer {access_token}'}
-    userinfo_response = requests.get(
+    userinfo_response = get_http_pool().request(
+        "GET",
         userinfo_uri,
         headers=headers,
         timeout=timeout
     ).json()
-    logger.info(f"OIDC user info:\n{pretty_repr(userinfo_response)}")
+    logger.debug("OIDC user info:\n%s", LazyRepr(userinfo_response))
 
     unique_id = userinfo_response.get("sub")
     user_email = userinfo_response.get("email", "")
@@ -125,10 +411,11 @@ def get_oidc_user_info(userinfo_uri: str, access_token: str,
     return (unique_id, user_email, user_name)
 
 
+@traced("login.idc_context", step=3)
 def get_idc_sts_id_context(idc_app_auth_provider_arn: str, id_token: str,
-                           region_name: str) -> str:
+                           region_name: str, timeout: Optional[float] = None) -> str:
     """Exchanges OIDC ID token with IDC provide app to get STS id context"""
-    sso_oidc_client = boto3.client('sso-oidc', region_name=region_name)
+    sso_oidc_client = get_client_cache().get('sso-oidc', region_name, timeout)
     try:
         idc_sso_resp = sso_oidc_client.create_token_with_iam(
             clientId=idc_app_auth_provider_arn,
@@ -137,13 +424,13 @@ def get_idc_sts_id_context(idc_app_auth_provider_arn: str, id_token: str,
             # scope=["openid", "sts:identity_context", 'aws'],
             assertion=id_token,
         )
-        logger.info(f"IDC create token response:\n{pretty_repr(idc_sso_resp)}")
+        logger.debug("IDC create token response:\n%s", LazyRepr(idc_sso_resp))
         idc_id_jwt = jwt.decode(
             idc_sso_resp["idToken"],
             algorithms=["RS256"],
             options={"verify_signature": False}
         )
-        logger.info(f"IDC IAM token:\n{pretty_repr(idc_id_jwt)}")
+        logger.debug("IDC IAM token:\n%s", LazyRepr(idc_id_jwt))
         return idc_id_jwt["sts:identity_context"]
     except sso_oidc_client.exceptions.InvalidGrantException as ex:
         err_msg = (
@@ -155,10 +442,11 @@ def get_idc_sts_id_context(idc_app_auth_provider_arn: str, id_token: str,
         raise AccessHelperException(err_msg) from ex
 
 
+@traced("login.sts_credential", step=4)
 def get_sts_credential(idc_assume_role_arn: str, sts_context: str,
-                       region_name: str) -> dict:
+                       region_name: str, timeout: Optional[float] = None) -> dict:
     """Assumes IDC ID based role and generates aws credentials"""
-    sts_client = boto3.client('sts', region_name=region_name)
+    sts_client = get_client_cache().get('sts', region_name, timeout)
     # Random hash used of unique session name. collisions are fine.
     session_name = "qbusiness-idc-" + "".join(
         random.choices(string.ascii_letters + string.digits, k=32)  # nosec
@@ -175,3 +463,139 @@ def get_sts_credential(idc_assume_role_arn: str, sts_context: str,
     if not credential:
         raise AccessHelperException("Unable to obtain STS temporary credential.")
     return credential
+
+
+def warm_up_token_exchange_clients(region_name: str) -> None:
+    """Create sso-oidc and STS clients ahead of the first token exchange"""
+    get_client_cache().warm_up(TOKEN_EXCHANGE_SERVICES, region_name)
+
+
+class TokenExchangeTimeouts(BaseModel):
+    """Per step timeouts in seconds for the async token exchange"""
+    id_token: float = 15
+    idc_context: float = 15
+    sts_credential: float = 15
+
+
+class TokenExchangeResult(BaseModel):
+    """OIDC tokens and STS credential from a completed token exchange"""
+    oidc_data: OidcData
+    credential: dict
+
+
+_exchange_executor: Optional[ThreadPoolExecutor] = None
+_exchange_executor_lock = threading.Lock()
+
+
+def _get_exchange_executor() -> ThreadPoolExecutor:
+    global _exchange_executor  # pylint: disable=global-statement
+    if _exchange_executor is None:
+        with _exchange_executor_lock:
+            if _exchange_executor is None:
+                _exchange_executor = ThreadPoolExecutor(
+                    max_workers=TOKEN_EXCHANGE_MAX_WORKERS,
+                    thread_name_prefix="token-exchange"
+                )
+    return _exchange_executor
+
+
+def configure_token_exchange_executor(max_workers: int) -> None:
+    """Resize the bounded executor used by the async token exchange.
+
+    Defaults to `TOKEN_EXCHANGE_MAX_WORKERS` steps at a time, size it for
+    the expected concurrent sign-ins. Further steps wait for a worker.
+    """
+    global _exchange_executor  # pylint: disable=global-statement
+    with _exchange_executor_lock:
+        previous, _exchange_executor = _exchange_executor, ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="token-exchange"
+        )
+    if previous:
+        previous.shutdown(wait=False)
+
+
+async def _run_exchange_step(step: str, timeout: Optional[float],
+                             func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking exchange step on the bounded executor.
+
+    `timeout` is passed to the blocking call, bounding its requests, and
+    counts from the moment a worker starts the step, not while it is queued.
+    On timeout or cancellation the awaiting coroutine returns immediately,
+    and a step still queued is cancelled.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.create_future()
+
+    def run() -> Any:
+        loop.call_soon_threadsafe(started.set_result, None)
+        return func(*args, timeout=timeout, **kwargs)
+
+    future = loop.run_in_executor(_get_exchange_executor(), run)
+    try:
+        await asyncio.wait((started, future), return_when=asyncio.FIRST_COMPLETED)
+        return await asyncio.wait_for(future, timeout)
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except asyncio.TimeoutError as ex:
+        raise AccessHelperException(
+            f"Token exchange step '{step}' timed out after {timeout} sec."
+        ) from ex
+
+
+async def get_oidc_id_token_async(base_url: str, code: str, token_uri: str,
+                                  client_id: str, client_secret: str,
+                                  timeout: Optional[float] = None,
+                                  issuer_url: Optional[str] = None) -> OidcData:
+    """Obtain OIDC access and identity token without blocking the event loop"""
+    return await _run_exchange_step(
+        "id_token", timeout, get_oidc_id_token,
+        base_url=base_url, code=code, token_uri=token_uri,
+        client_id=client_id, client_secret=client_secret,
+        issuer_url=issuer_url
+    )
+
+
+async def get_idc_sts_id_context_async(idc_app_auth_provider_arn: str, id_token: str,
+                                       region_name: str,
+                                       timeout: Optional[float] = None) -> str:
+    """Exchange OIDC ID token for STS id context without blocking the event loop"""
+    return await _run_exchange_step(
+        "idc_context", timeout, get_idc_sts_id_context,
+        idc_app_auth_provider_arn, id_token, region_name
+    )
+
+
+async def get_sts_credential_async(idc_assume_role_arn: str, sts_context: str,
+                                   region_name: str,
+                                   timeout: Optional[float] = None) -> dict:
+    """Assume IDC ID based role without blocking the event loop"""
+    return await _run_exchange_step(
+        "sts_credential", timeout, get_sts_credential,
+        idc_assume_role_arn, sts_context, region_name
+    )
+
+
+async def exchange_authorization_code_async(
+        base_url: str, code: str, token_uri: str,
+        client_id: str, client_secret: str,
+        idc_app_auth_provider_arn: str, idc_assume_role_arn: str,
+        region_name: str, issuer_url: Optional[str] = None,
+        timeouts: Optional[TokenExchangeTimeouts] = None) -> TokenExchangeResult:
+    """Run the authorization code to STS credential exchange asynchronously"""
+    timeouts = timeouts if timeouts else TokenExchangeTimeouts()
+    oidc_data = await get_oidc_id_token_async(
+        base_url=base_url, code=code, token_uri=token_uri,
+        client_id=client_id, client_secret=client_secret,
+        timeout=timeouts.id_token, issuer_url=issuer_url
+    )
+    sts_context = await get_idc_sts_id_context_async(
+        idc_app_auth_provider_arn, oidc_data.id_token, region_name,
+        timeout=timeouts.idc_context
+    )
+    credential = await get_sts_credential_async(
+        idc_assume_role_arn, sts_context, region_name,
+        timeout=timeouts.sts_credential
+    )
+    return TokenExchangeResult(oidc_data=oidc_data, credential=credential)
@@ -5,58 +5,135 @@
 
 """Amazon Q Business Expert API helpers to parse responses and paginate"""
 
-import os
+import time
 import random
 import string
-import logging
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, List, Iterator, Optional
 from datetime import datetime, timedelta
 from dateutil import tz
-
-import boto3
-from rich.logging import RichHandler
+from botocore.exceptions import ClientError, ConnectionError as BotoConnectionError, HTTPClientError
+
+from qbapi_tools.client_pool import credentials_identity, get_service_client_pool
+from qbapi_tools.hedging import HedgingPolicy
+from qbapi_tools.pagination import fan_out_pages, iter_page_items
+from qbapi_tools.rate_limit import THROTTLING_ERROR_CODES
+from qbapi_tools.log_config import get_logger
+from qbapi_tools.tracing import traced
+from qbapi_tools.ttl_cache import TtlCache
 from qbapi_tools.datamodel import (
     ServiceConfig, DataSourceEnum,
     Application, ListApplicationsResponse,
     Index, ListIndicesResponse,
     DataSource, ListDataSourcesResponse,
+    IndexTopology, ApplicationTopology,
     DocumentDetail, DocumentDetailsResponse,
     ListConversationsResponse, Conversation,
+    ConversationPurgeSummary, ConversationDeleteFailure,
     AIScope, ChatMode, ChatControlConfigResponse,
+    ChatControlsSnapshot, CreatorModeConfiguration,
     ChatSyncResponse, ChatAttachment,
     CreateDataSourceResponse, StartDataSourceSyncJobResponse,
-    GetUserResponse
+    GetUserResponse, Retriever, ListRetrieversResponse,
+    RelevantContent, SearchRelevantContentResponse
 )
 from qbapi_tools.exception import (
     ChatAIResponseScopeNotFound,
-    ChatSyncConversationMissingParameters
+    ChatSyncConversationMissingParameters,
+    CredentialRefreshException
 )
 
-logger = logging.getLogger("qbapi_tools")
-logger.addHandler(RichHandler(show_time=False, rich_tracebacks=False))
-logger.setLevel(logging.getLevelName(os.environ.get('logging', 'DEBUG')))
+logger = get_logger()
 
 MSG_MISSING_USER_ID = "'user_id' parameter is required, if not using identity propagation credentials."
 MSG_MISSING_CONV_SYSMSG_ID = "Both conversation ID and previous system message ID are required."
 MSG_MISSING_AI_CHAT_SCOPE = "AI chat response scope setting not found."
 
+TOPOLOGY_CACHE_TTL = 300
+CHAT_CONTROLS_CACHE_TTL = 60
+
+# Retried by purge_conversations_by_age, other errors are permanent
+TRANSIENT_ERROR_CODES = THROTTLING_ERROR_CODES | frozenset((
+    "InternalServerException", "ServiceUnavailableException",
+    "RequestTimeout", "RequestTimeoutException",
+))
+PURGE_BACKOFF_BASE = 0.5
+PURGE_BACKOFF_MAX = 20.0
+
+_topology_cache = TtlCache(ttl=TOPOLOGY_CACHE_TTL)
+_chat_controls_cache = TtlCache(ttl=CHAT_CONTROLS_CACHE_TTL)
+
+
+def get_topology_cache() -> TtlCache:
+    """Shared application topology cache"""
+    return _topology_cache
+
+
+def configure_topology_cache(cache: TtlCache) -> TtlCache:
+    """Replace the shared application topology cache"""
+    global _topology_cache  # pylint: disable=global-statement
+    _topology_cache = cache
+    return cache
+
+
+def get_chat_controls_cache() -> TtlCache:
+    """Shared chat controls snapshot cache"""
+    return _chat_controls_cache
+
+
+def configure_chat_controls_cache(cache: TtlCache) -> TtlCache:
+    """Replace the shared chat controls snapshot cache"""
+    global _chat_controls_cache  # pylint: disable=global-statement
+    _chat_controls_cache = cache
+    return cache
+
 
 class QBusinessAPIHelpers:
     """Q Business API helper methods"""
-    def __init__(self, service_config: ServiceConfig, credentials=None) -> None:
+    def __init__(self, service_config: ServiceConfig, credentials=None,
+                 topology_cache: Optional[TtlCache] = None,
+                 chat_controls_cache: Optional[TtlCache] = None,
+                 hedging: Optional[HedgingPolicy] = None) -> None:
         self.service_config = service_config
         self.credentials = credentials
+        self.hedging = hedging
+        self.topology_cache = topology_cache if topology_cache else get_topology_cache()
+        self.chat_controls_cache = chat_controls_cache if chat_controls_cache \
+            else get_chat_controls_cache()
         self._client = self._get_client()
 
     def _get_client(self) -> Any:
-        if self.credentials:
-            assumed_session = boto3.Session(
-                aws_access_key_id=self.credentials['AccessKeyId'],
-                aws_secret_access_key=self.credentials['SecretAccessKey'],
-                aws_session_token=self.credentials['SessionToken']
-            )
-            return assumed_session.client(**self.service_config.model_dump())
-        return boto3.client(**self.service_config.model_dump())
+        # Handles are cheap, clients are pooled per credentials
+        return get_service_client_pool().get(self.credentials, self.service_config)
+
+    def _call(self, operation: str, **params) -> dict:
+        """Call a client method, hedged when a hedging policy is set"""
+        if self.hedging:
+            return self.hedging.call(self._client, operation, **params)
+        return getattr(self._client, operation)(**params)
+
+    def _paginate(self, operation: str, **params) -> Iterator[dict]:
+        """Iterate response pages of a list operation"""
+        if not self.hedging:
+            yield from self._client.get_paginator(operation).paginate(**params)
+            return
+        # Pages are requested one call at a time, so each page can be hedged
+        while True:
+            page = self._call(operation, **params)
+            yield page
+            if not page.get("nextToken"):
+                return
+            params = {**params, "nextToken": page["nextToken"]}
+
+    def _add_user_id(self, params: dict, user_id: Optional[str]) -> dict:
+        """Add user ID to request parameters, unless using identity propagation"""
+        if not user_id and not self.credentials:
+            raise ChatSyncConversationMissingParameters(MSG_MISSING_USER_ID)
+        if user_id and not self.credentials:
+            params["userId"] = user_id
+        return params
 
     def _get_client_token(self) -> str:
         return "".join(random.choices(
@@ -64,96 +141,171 @@ class QBusinessAPIHelpers:
             k=32
         ))  # nosec
 
-    def list_applications(self) -> Iterator[Application]:
-        """Iterate applications"""
-        paginator = self._client.get_paginator('list_applications')
-        page_iterator = paginator.paginate()
-        for page in page_iterator:
-            list_apps_resp: ListApplicationsResponse = ListApplicationsResponse(
-                **page
-            )
-            for app in list_apps_resp.applications:
-                yield app
+    @traced("qbusiness.list_applications", step=5)
+    def list_applications(self, prefetch: int = 0) -> Iterator[Application]:
+        """Iterate applications, reading up to `prefetch` pages ahead"""
+        page_iterator = self._paginate('list_applications')
+        yield from iter_page_items(
+            (ListApplicationsResponse(**page).applications for page in page_iterator),
+            prefetch
+        )
 
-    def list_indices(self, app_id: str) -> Iterator[Index]:
+    @traced("qbusiness.list_indices", step=5)
+    def list_indices(self, app_id: str, prefetch: int = 0) -> Iterator[Index]:
         """Iterate indices for a given application"""
-        paginator = self._client.get_paginator('list_indices')
-        page_iterator = paginator.paginate(applicationId=app_id)
-        for page in page_iterator:
-            list_indices_resp: ListIndicesResponse = ListIndicesResponse(
-                **page
-            )
-            for idx in list_indices_resp.indices:
-                yield idx
+        page_iterator = self._paginate('list_indices', applicationId=app_id)
+        yield from iter_page_items(
+            (ListIndicesResponse(**page).indices for page in page_iterator),
+            prefetch
+        )
 
+    @traced("qbusiness.list_data_sources", step=5)
     def list_data_sources(
             self,
             app_id: str,
-            index_id: str) -> Iterator[DataSource]:
+            index_id: str,
+            prefetch: int = 0) -> Iterator[DataSource]:
         """Iterate data sources for a given application and index"""
-        paginator = self._client.get_paginator('list_data_sources')
-        page_iterator = paginator.paginate(
+        page_iterator = self._paginate(
+            'list_data_sources',
             applicationId=app_id,
             indexId=index_id
         )
+        yield from iter_page_items(
+            (ListDataSourcesResponse(**page).dataSources for page in page_iterator),
+            prefetch
+        )
+
+    def _document_pages(self, app_id: str, index_id: str,
+                        ds_id: str) -> Iterator[List[DocumentDetail]]:
+        page_iterator = self._paginate(
+            'list_documents',
+            applicationId=app_id,
+            indexId=index_id,
+            dataSourceIds=[ds_id]  # API accepts list of size 1 only
+        )
         for page in page_iterator:
-            list_ds_resp: ListDataSourcesResponse = ListDataSourcesResponse(
+            list_docs_resp: DocumentDetailsResponse = DocumentDetailsResponse(
                 **page
             )
-            for ds in list_ds_resp.dataSources:
-                yield ds
+            yield list_docs_resp.documentDetailList
+
+    def _iter_document_sources(
+            self, app_id: str, sources: List[tuple[str, str]],
+            max_workers: Optional[int], preserve_order: bool,
+            prefetch: int = 0) -> Iterator[DocumentDetail]:
+        """Iterate documents of (index ID, data source ID) pairs,
+        in parallel when max_workers is greater than 1"""
+        if max_workers and max_workers > 1:
+            yield from fan_out_pages(
+                sources,
+                lambda source: self._document_pages(app_id, *source),
+                max_workers=max_workers,
+                preserve_order=preserve_order
+            )
+            return
+        yield from iter_page_items(
+            (docs
+             for index_id, ds_id in sources
+             for docs in self._document_pages(app_id, index_id, ds_id)),
+            prefetch
+        )
 
+    @traced("qbusiness.list_documents", step=5)
     def list_documents(
             self,
             app_id: str,
             index_id: str,
-            ds_id_list: List[str]) -> Iterator[DocumentDetail]:
+            ds_id_list: List[str],
+            max_workers: Optional[int] = None,
+            preserve_order: bool = False,
+            prefetch: int = 0) -> Iterator[DocumentDetail]:
         """Iterate documents for a given application,
-        index and list of data sources"""
-        for ds_id in ds_id_list:
-            paginator = self._client.get_paginator('list_documents')
-            page_iterator = paginator.paginate(
-                applicationId=app_id,
-                indexId=index_id,
-                dataSourceIds=[ds_id]  # API accepts list of size 1 only
-            )
-            for page in page_iterator:
-                list_docs_resp: DocumentDetailsResponse = DocumentDetailsResponse(
-                    **page
-                )
-                for docs in list_docs_resp.documentDetailList:
-                    yield docs
+        index and list of data sources.
+        Data sources are paginated in parallel when max_workers > 1, with
+        documents grouped by data source when preserve_order is set.
+        Otherwise up to `prefetch` pages are read ahead."""
+        yield from self._iter_document_sources(
+            app_id,
+            [(index_id, ds_id) for ds_id in ds_id_list],
+            max_workers,
+            preserve_order,
+            prefetch
+        )
 
+    @traced("qbusiness.list_documents_by_datasource_type", step=5)
     def list_documents_by_datasource_type(
             self,
             app_id: str,
-            ds_type: Optional[DataSourceEnum] = None) -> Iterator[DocumentDetail]:
+            ds_type: Optional[DataSourceEnum] = None,
+            max_workers: Optional[int] = None,
+            preserve_order: bool = False,
+            prefetch: int = 0) -> Iterator[DocumentDetail]:
         """Iterate documents for a given application and optional
-        datasource type (eg. CONFLUENCE)"""
-        idx_iter = self.list_indices(app_id=app_id)
-        for idx in idx_iter:
-            ds_iter = self.list_data_sources(
-                app_id=app_id,
-                index_id=idx.indexId
-            )
-            ds_ids = []
-            if not ds_type:
-                ds_ids = list(map(lambda ds: ds.dataSourceId, ds_iter))
-            else:
-                ds_ids = list(
-                    map(
-                        lambda ds: ds.dataSourceId,
-                        filter(lambda ds: ds.type==ds_type, ds_iter)  # noqa: E225
+        datasource type (eg. CONFLUENCE).
+        Data sources of all indices are paginated in parallel when
+        max_workers > 1."""
+        sources = self.get_topology(app_id).data_sources_by_type(ds_type)
+        yield from self._iter_document_sources(
+            app_id, sources, max_workers, preserve_order, prefetch
+        )
+
+    def _app_cache_key(self, app_id: str) -> tuple:
+        return (app_id, self.service_config.region_name, credentials_identity(self.credentials))
+
+    @traced("qbusiness.get_topology", step=5)
+    def get_topology(self, app_id: str, refresh: bool = False) -> ApplicationTopology:
+        """Indices and data sources of an application, cached for the topology cache TTL"""
+        key = self._app_cache_key(app_id)
+        topology = None if refresh else self.topology_cache.get(key)
+        if topology is None:
+            topology = self.topology_cache.put(key, ApplicationTopology(
+                applicationId=app_id,
+                indices=[
+                    IndexTopology(
+                        index=idx,
+                        dataSources=list(self.list_data_sources(app_id, idx.indexId))
                     )
-                )
-            docs_iter = self.list_documents(
-                app_id=app_id,
-                index_id=idx.indexId,
-                ds_id_list=ds_ids
+                    for idx in self.list_indices(app_id)
+                ]
+            ))
+        return topology
+
+    def invalidate_topology(self, app_id: str) -> None:
+        """Drop cached topology of an application"""
+        self.topology_cache.invalidate(lambda key: key[0] == app_id)
+
+    def _update_chat_controls(self, app_id: str, **changes) -> None:
+        """Write an update through to the cached snapshot of these credentials"""
+        key = self._app_cache_key(app_id)
+        snapshot = self.chat_controls_cache.get(key)
+        self.chat_controls_cache.invalidate(lambda cache_key: cache_key[0] == app_id)
+        if snapshot:
+            self.chat_controls_cache.put(key, snapshot.model_copy(update=changes))
+
+    @traced("qbusiness.get_chat_controls", step=5)
+    def get_chat_controls(self, app_id: str, refresh: bool = False) -> ChatControlsSnapshot:
+        """Chat controls fetched in one pass, cached for the chat controls cache TTL"""
+        key = self._app_cache_key(app_id)
+        snapshot = None if refresh else self.chat_controls_cache.get(key)
+        if snapshot is None:
+            snapshot = ChatControlsSnapshot(applicationId=app_id)
+            page_iterator = self._paginate(
+                'get_chat_controls_configuration', applicationId=app_id
             )
-            for doc in docs_iter:
-                yield doc
-
+            for page in page_iterator:
+                chat_conf_resp: ChatControlConfigResponse = ChatControlConfigResponse(
+                    **page
+                )
+                if chat_conf_resp.responseScope and not snapshot.responseScope:
+                    snapshot.responseScope = chat_conf_resp.responseScope
+                if chat_conf_resp.creatorModeConfiguration \
+                        and not snapshot.creatorModeConfiguration:
+                    snapshot.creatorModeConfiguration = chat_conf_resp.creatorModeConfiguration
+            self.chat_controls_cache.put(key, snapshot)
+        return snapshot
+
+    @traced("qbusiness.allow_ai_fallback", step=5)
     def allow_ai_fallback(self, app_id: str, allow: bool = True) -> None:
         """Enable/disable fallback to AI to use its knowledge to answer questions"""
         scope = AIScope.extended if allow else AIScope.enterprise
@@ -162,19 +314,17 @@ class QBusinessAPIHelpers:
             responseScope=scope,
             clientToken=self._get_client_token()
         )
+        self._update_chat_controls(app_id, responseScope=scope)
 
+    @traced("qbusiness.is_ai_fallback_allowed", step=5)
     def is_ai_fallback_allowed(self, app_id: str) -> bool:
         """Find if allowed to fallback to AI knowledge to answer questions"""
-        paginator = self._client.get_paginator('get_chat_controls_configuration')
-        page_iterator = paginator.paginate(applicationId=app_id)
-        for page in page_iterator:
-            chat_conf_resp: ChatControlConfigResponse = ChatControlConfigResponse(
-                **page
-            )
-            if chat_conf_resp.responseScope:
-                return chat_conf_resp.responseScope == AIScope.extended
-        raise ChatAIResponseScopeNotFound(MSG_MISSING_AI_CHAT_SCOPE)
+        allowed = self.get_chat_controls(app_id).ai_fallback_allowed
+        if allowed is None:
+            raise ChatAIResponseScopeNotFound(MSG_MISSING_AI_CHAT_SCOPE)
+        return allowed
 
+    @traced("qbusiness.allow_creator_mode", step=5)
     def allow_creator_mode(self, app_id: str, allow: bool = True) -> None:
         """Enable/disable direct LLM access for creators"""
         scope = 'ENABLED' if allow else 'DISABLED'
@@ -183,20 +333,21 @@ class QBusinessAPIHelpers:
             creatorModeConfiguration={'creatorModeControl': scope},
             clientToken=self._get_client_token()
         )
+        self._update_chat_controls(
+            app_id,
+            creatorModeConfiguration=CreatorModeConfiguration(creatorModeControl=scope)
+        )
 
+    @traced("qbusiness.is_creator_mode_allowed", step=5)
     def is_creator_mode_allowed(self, app_id: str) -> bool:
         """Find if direct LLM access for creators is enabled"""
-        paginator = self._client.get_paginator('get_chat_controls_configuration')
-        page_iterator = paginator.paginate(applicationId=app_id)
-        for page in page_iterator:
-            chat_conf_resp: ChatControlConfigResponse = ChatControlConfigResponse(
-                **page
-            )
-            if chat_conf_resp.creatorModeConfiguration:
-                return chat_conf_resp.creatorModeConfiguration.creatorModeControl == "ENABLED"
-        logger.warning("Creator mode configuration not found.")
-        return False
+        allowed = self.get_chat_controls(app_id).creator_mode_allowed
+        if allowed is None:
+            logger.warning("Creator mode configuration not found.")
+            return False
+        return allowed
 
+    @traced("qbusiness.create_custom_ds", step=5)
     def create_custom_ds(self, app_id: str, index_id: str, name: str) -> CreateDataSourceResponse:
         """Creates custom data source"""
         ds_create_resp = self._client.create_data_source(
@@ -205,8 +356,10 @@ class QBusinessAPIHelpers:
             displayName=name,
             configuration={"type": DataSourceEnum.custom, "version": "1.0.0"}
         )
+        self.invalidate_topology(app_id)
         return CreateDataSourceResponse(**ds_create_resp)
 
+    @traced("qbusiness.delete_ds", step=5)
     def delete_ds(self, app_id: str, index_id: str, ds_id: str) -> None:
         """Deletes a data source"""
         self._client.delete_data_source(
@@ -214,7 +367,9 @@ class QBusinessAPIHelpers:
             indexId=index_id,
             dataSourceId=ds_id
         )
+        self.invalidate_topology(app_id)
 
+    @traced("qbusiness.start_ds_sync_job", step=5)
     def start_ds_sync_job(self, app_id: str, index_id: str, ds_id: str) -> StartDataSourceSyncJobResponse:
         """Start data source sync job"""
         ds_start_sync_resp = self._client.start_data_source_sync_job(
@@ -224,6 +379,7 @@ class QBusinessAPIHelpers:
         )
         return StartDataSourceSyncJobResponse(**ds_start_sync_resp)
 
+    @traced("qbusiness.stop_ds_sync_job", step=5)
     def stop_ds_sync_job(self, app_id: str, index_id: str, ds_id: str) -> None:
         """Stop data source sync job"""
         self._client.stop_data_source_sync_job(
@@ -232,6 +388,7 @@ class QBusinessAPIHelpers:
             dataSourceId=ds_id
         )
 
+    @traced("qbusiness.put_documents", step=5)
     def put_documents(self, app_id: str, index_id: str, sync_id: str, documents: dict):
         """Puts documents to custom data source"""
         put_docs_resp = self._client.batch_put_document(
@@ -242,6 +399,7 @@ class QBusinessAPIHelpers:
         )
         return put_docs_resp
 
+    @traced("qbusiness.add_user_alias", step=5)
     def add_user_alias(
             self, email: str, alias: str, app_id: str,
             index_id: str, ds_id: str) -> dict:
@@ -249,7 +407,8 @@ class QBusinessAPIHelpers:
         get_user_resp = None
         alias_list = []
         try:
-            get_user_resp = GetUserResponse(**self._client.get_user(
+            get_user_resp = GetUserResponse(**self._call(
+                'get_user',
                 applicationId=app_id,
                 userId=email
             ))
@@ -301,25 +460,38 @@ class QBusinessAPIHelpers:
         # No action: user and alias exist
         return {}
 
+    @traced("qbusiness.list_conversations", step=5)
     def list_conversations(self, app_id: str,
-                           user_id: Optional[str] = None) -> Iterator[Conversation]:
+                           user_id: Optional[str] = None,
+                           prefetch: int = 0) -> Iterator[Conversation]:
         """Iterate conversations for a given application and user"""
         params = {
             "applicationId": app_id
         }
-        if not user_id and not self.credentials:
-            raise ChatSyncConversationMissingParameters(MSG_MISSING_USER_ID)
-        if user_id and not self.credentials:
-            params["userId"] = user_id
-        paginator = self._client.get_paginator('list_conversations')
-        page_iterator = paginator.paginate(**params)
-        for page in page_iterator:
-            list_conv_resp: ListConversationsResponse = ListConversationsResponse(
-                **page
-            )
-            for conversation in list_conv_resp.conversations:
-                yield conversation
+        self._add_user_id(params, user_id)
+        page_iterator = self._paginate('list_conversations', **params)
+        yield from iter_page_items(
+            (ListConversationsResponse(**page).conversations for page in page_iterator),
+            prefetch
+        )
 
+    @traced("qbusiness.list_conversations_page", step=5)
+    def list_conversations_page(self, app_id: str,
+                                user_id: Optional[str] = None,
+                                page_size: Optional[int] = None,
+                                next_token: Optional[str] = None) -> ListConversationsResponse:
+        """Single page of conversations, and the token of the next page if any"""
+        params = {
+            "applicationId": app_id
+        }
+        self._add_user_id(params, user_id)
+        if page_size:
+            params["maxResults"] = page_size
+        if next_token:
+            params["nextToken"] = next_token
+        return ListConversationsResponse(**self._call('list_conversations', **params))
+
+    @traced("qbusiness.delete_conversation", step=5)
     def delete_conversation(
             self, conversation_id: str, app_id: str, user_id: Optional[str] = None) -> bool:
         """Delete a conversation"""
@@ -327,17 +499,17 @@ class QBusinessAPIHelpers:
             "applicationId": app_id,
             "conversationId": conversation_id
         }
-        if not user_id and not self.credentials:
-            raise ChatSyncConversationMissingParameters(MSG_MISSING_USER_ID)
-        if user_id and not self.credentials:
-            params["userId"] = user_id
+        self._add_user_id(params, user_id)
         try:
             self._client.delete_conversation(**params)
             return True
+        except CredentialRefreshException:
+            raise
         except Exception as ex:  # pylint: disable=broad-exception-caught
             logger.exception(ex.args[0])
         return False
 
+    @traced("qbusiness.delete_conversations_by_age", step=5)
     def delete_conversations_by_age(
             self, app_id: str, user_id: Optional[str] = None,
             age: Optional[timedelta] = None) -> bool:
@@ -356,6 +528,165 @@ class QBusinessAPIHelpers:
                     return False
         return True
 
+    def _delete_conversation_attempts(
+            self, client: Any, params: dict,
+            max_attempts: int) -> tuple[Optional[ConversationDeleteFailure], int]:
+        """Delete a conversation, retrying transient errors with jittered backoff.
+        Returns the failure, if any, and the number of attempts."""
+        for attempt in range(1, max_attempts + 1):
+            try:
+                client.delete_conversation(**params)
+                return None, attempt
+            except ClientError as ex:
+                error = ex.response.get("Error", {})
+                code = error.get("Code", "Unknown")
+                if code not in TRANSIENT_ERROR_CODES or attempt == max_attempts:
+                    return ConversationDeleteFailure(
+                        conversationId=params["conversationId"],
+                        errorCode=code,
+                        errorMessage=error.get("Message"),
+                        attempts=attempt
+                    ), attempt
+            except (BotoConnectionError, HTTPClientError) as ex:
+                if attempt == max_attempts:
+                    return ConversationDeleteFailure(
+                        conversationId=params["conversationId"],
+                        errorCode=type(ex).__name__,
+                        errorMessage=str(ex),
+                        attempts=attempt
+                    ), attempt
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                # eg. missing or expired credentials, recorded rather than lost
+                return ConversationDeleteFailure(
+                    conversationId=params["conversationId"],
+                    errorCode=type(ex).__name__,
+                    errorMessage=str(ex),
+                    attempts=attempt
+                ), attempt
+            time.sleep(random.uniform(
+                0, min(PURGE_BACKOFF_MAX, PURGE_BACKOFF_BASE * 2 ** (attempt - 1))
+            ))
+        return None, max_attempts
+
+    @traced("qbusiness.purge_conversations_by_age", step=5)
+    def purge_conversations_by_age(
+            self, app_id: str, user_id: Optional[str] = None,
+            age: Optional[timedelta] = None,
+            max_workers: int = 8,
+            max_attempts: int = 5) -> ConversationPurgeSummary:
+        """Delete conversations by age with concurrent deleters.
+
+        Conversations are handed to `max_workers` deleters while the listing
+        is still paginating. Throttled and transient failures are retried up
+        to `max_attempts` times, other failures are recorded and the purge
+        continues. Conversations newer than `age` are skipped, and those
+        deleted meanwhile are reported as not found. Every listed
+        conversation is accounted for in the summary. A listing error stops
+        the purge and is recorded in the summary along with the deletes
+        already made. Calls go through the shared rate limiter when
+        configured.
+        """
+        age = age if age else timedelta(seconds=0)
+        # tzlocal used for consistency with conversation.startTime
+        expiry_cutoff = datetime.now(tz.tzlocal()) - age
+        params = self._add_user_id({"applicationId": app_id}, user_id)
+        client = self._client
+        summary = ConversationPurgeSummary(applicationId=app_id)
+        lock = threading.Lock()
+        # Bounds conversations listed ahead of the deleters
+        slots = threading.BoundedSemaphore(max_workers * 2)
+        started = time.perf_counter()
+
+        def delete(conversation_id: str) -> None:
+            delete_started = time.perf_counter()
+            try:
+                failure, attempts = self._delete_conversation_attempts(
+                    client, {**params, "conversationId": conversation_id}, max_attempts
+                )
+            finally:
+                slots.release()
+            seconds = time.perf_counter() - delete_started
+            with lock:
+                summary.retries += attempts - 1
+                summary.deleteSeconds += seconds
+                if failure is None:
+                    summary.deleted.append(conversation_id)
+                elif failure.errorCode == "ResourceNotFoundException":
+                    summary.notFound.append(conversation_id)
+                else:
+                    summary.failed.append(failure)
+                    logger.warning(
+                        f"Conversation '{conversation_id}' not deleted: {failure.errorCode}"
+                    )
+
+        with ThreadPoolExecutor(max_workers=max_workers,
+                                thread_name_prefix="conversation-purge") as executor:
+            try:
+                for conversation in self.list_conversations(app_id, user_id):
+                    if conversation.startTime > expiry_cutoff:
+                        summary.skipped.append(conversation.conversationId)
+                        continue
+                    slots.acquire()
+                    executor.submit(
+                        contextvars.copy_context().run, delete, conversation.conversationId
+                    )
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                summary.listingError = f"{type(ex).__name__}: {ex}"
+                logger.warning(f"Listing conversations of '{app_id}' failed: {ex}")
+        summary.elapsedSeconds = time.perf_counter() - started
+        logger.info(
+            f"Purged conversations of '{app_id}': {len(summary.deleted)} deleted, "
+            f"{len(summary.notFound)} not found, {len(summary.skipped)} skipped, "
+            f"{len(summary.failed)} failed "
+            f"in {summary.elapsedSeconds:.1f}s"
+        )
+        return summary
+
+    @traced("qbusiness.list_retrievers", step=5)
+    def list_retrievers(self, app_id: str, prefetch: int = 0) -> Iterator[Retriever]:
+        """Iterate retrievers for a given application"""
+        page_iterator = self._paginate('list_retrievers', applicationId=app_id)
+        yield from iter_page_items(
+            (ListRetrieversResponse(**page).retrievers for page in page_iterator),
+            prefetch
+        )
+
+    def _search_params(self, query: str, app_id: str, retriever_id: str,
+                       attribute_filter: Optional[dict],
+                       page_size: Optional[int]) -> dict:
+        """SearchRelevantContent request parameters"""
+        params = {
+            "applicationId": app_id,
+            "queryText": query,
+            "contentSource": {"retriever": {"retrieverId": retriever_id}}
+        }
+        if attribute_filter:
+            params["attributeFilter"] = attribute_filter
+        if page_size:
+            params["maxResults"] = page_size
+        return params
+
+    @traced("qbusiness.search_relevant_content", step=5)
+    def search_relevant_content(
+            self, query: str, app_id: str, retriever_id: str,
+            attribute_filter: Optional[dict] = None,
+            page_size: Optional[int] = None,
+            prefetch: int = 0) -> Iterator[RelevantContent]:
+        """Iterate passages relevant to a query, ranked by the retriever.
+
+        Retrieval only, no answer is generated. Results are those visible to
+        the identity of the credentials, so no user ID is passed. Pages are
+        requested as the iterator is consumed.
+        """
+        params = self._search_params(query, app_id, retriever_id, attribute_filter, page_size)
+        page_iterator = self._paginate('search_relevant_content', **params)
+        yield from iter_page_items(
+            (SearchRelevantContentResponse(**page).relevantContent
+             for page in page_iterator),
+            prefetch
+        )
+
+    @traced("qbusiness.chat_sync_ttp", step=5)
     def chat_sync_ttp(
             self, message: str, app_id: str,
             conversation_id: Optional[str] = None,
@@ -372,6 +703,7 @@ class QBusinessAPIHelpers:
             chat_mode=chat_mode
         )
 
+    @traced("qbusiness.chat_sync", step=5)
     def chat_sync(
             self, message: str, app_id: str,
             user_id: Optional[str] = None,
@@ -386,10 +718,7 @@ class QBusinessAPIHelpers:
             "userMessage": message,
             "chatMode": chat_mode
         }
-        if not user_id and not self.credentials:
-            raise ChatSyncConversationMissingParameters(MSG_MISSING_USER_ID)
-        if user_id and not self.credentials:
-            chat_params["userId"] = user_id
+        self._add_user_id(chat_params, user_id)
         if conversation_id and prev_sys_message_id:
             chat_params["conversationId"] = conversation_id
             chat_params["parentMessageId"] = prev_sys_message_id
@@ -0,0 +1,323 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=invalid-name,too-many-arguments
+
+"""Asyncio counterpart of the Amazon Q Business Expert API helpers"""
+
+import asyncio
+import functools
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional
+
+from pydantic import BaseModel
+
+from qbapi_tools.api_helpers import QBusinessAPIHelpers
+from qbapi_tools.hedging import HedgingPolicy
+from qbapi_tools.datamodel import (
+    ServiceConfig, DataSourceEnum,
+    Application, ListApplicationsResponse,
+    Index, ListIndicesResponse,
+    DataSource, ListDataSourcesResponse,
+    DocumentDetail, DocumentDetailsResponse,
+    ListConversationsResponse, Conversation, ConversationPurgeSummary,
+    ChatMode, ChatSyncResponse, ApplicationTopology, ChatControlsSnapshot,
+    CreateDataSourceResponse, StartDataSourceSyncJobResponse,
+    Retriever, ListRetrieversResponse, RelevantContent, SearchRelevantContentResponse,
+)
+
+API_HELPERS_MAX_WORKERS = 64
+
+_DONE = object()
+
+_api_executor: Optional[ThreadPoolExecutor] = None
+_api_executor_lock = threading.Lock()
+
+
+def get_api_executor() -> ThreadPoolExecutor:
+    """Bounded executor shared by async API helpers"""
+    global _api_executor  # pylint: disable=global-statement
+    if _api_executor is None:
+        with _api_executor_lock:
+            if _api_executor is None:
+                _api_executor = ThreadPoolExecutor(
+                    max_workers=API_HELPERS_MAX_WORKERS,
+                    thread_name_prefix="qbusiness-api"
+                )
+    return _api_executor
+
+
+def configure_api_executor(max_workers: int) -> None:
+    """Resize the bounded executor used by async API helpers"""
+    global _api_executor  # pylint: disable=global-statement
+    with _api_executor_lock:
+        previous, _api_executor = _api_executor, ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="qbusiness-api"
+        )
+    if previous:
+        previous.shutdown(wait=False)
+
+
+class AsyncQBusinessAPIHelpers:
+    """Q Business API helper methods for asyncio.
+
+    Blocking botocore calls run on a bounded thread pool shared by all
+    instances, so many users and crawlers can be driven from one event
+    loop with at most `API_HELPERS_MAX_WORKERS` calls in flight.
+    Paginated listings are async iterators fetching one page per call.
+    The sync helpers, and their client, are created by the first call on
+    the executor, never on the event loop thread.
+    """
+    def __init__(self, service_config: ServiceConfig, credentials=None,
+                 executor: Optional[ThreadPoolExecutor] = None,
+                 hedging: Optional[HedgingPolicy] = None) -> None:
+        self._service_config = service_config
+        self._credentials = credentials
+        self._hedging = hedging
+        self._executor = executor
+        self._helpers: Optional[QBusinessAPIHelpers] = None
+        self._helpers_lock = threading.Lock()
+
+    @property
+    def helpers(self) -> QBusinessAPIHelpers:
+        """Sync helpers, created on first use. Blocking, call from the executor."""
+        if self._helpers is None:
+            with self._helpers_lock:
+                if self._helpers is None:
+                    self._helpers = QBusinessAPIHelpers(
+                        self._service_config, self._credentials, hedging=self._hedging
+                    )
+        return self._helpers
+
+    async def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking call on the executor, keeping the current trace context"""
+        loop = asyncio.get_running_loop()
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor if self._executor else get_api_executor(),
+            functools.partial(context.run, func, *args, **kwargs)
+        )
+
+    def _invoke(self, method: str, *args, **kwargs) -> Any:
+        return getattr(self.helpers, method)(*args, **kwargs)
+
+    async def _call(self, method: str, *args, **kwargs) -> Any:
+        """Run a sync helpers method on the executor"""
+        return await self._run(self._invoke, method, *args, **kwargs)
+
+    async def _iterate(self, iterator: Iterator[Any]) -> AsyncIterator[Any]:
+        """Advance a blocking iterator on the executor"""
+        while True:
+            item = await self._run(next, iterator, _DONE)
+            if item is _DONE:
+                return
+            yield item
+
+    async def _paginate(self, operation: str, response_model: type[BaseModel],
+                        items_field: str, **params) -> AsyncIterator[Any]:
+        pages = await self._call('_paginate', operation, **params)
+        async for page in self._iterate(pages):
+            for item in getattr(response_model(**page), items_field):
+                yield item
+
+    async def list_applications(self) -> AsyncIterator[Application]:
+        """Iterate applications"""
+        async for app in self._paginate(
+                'list_applications', ListApplicationsResponse, 'applications'):
+            yield app
+
+    async def list_indices(self, app_id: str) -> AsyncIterator[Index]:
+        """Iterate indices for a given application"""
+        async for idx in self._paginate(
+                'list_indices', ListIndicesResponse, 'indices',
+                applicationId=app_id):
+            yield idx
+
+    async def list_data_sources(self, app_id: str, index_id: str) -> AsyncIterator[DataSource]:
+        """Iterate data sources for a given application and index"""
+        async for ds in self._paginate(
+                'list_data_sources', ListDataSourcesResponse, 'dataSources',
+                applicationId=app_id, indexId=index_id):
+            yield ds
+
+    async def list_documents(self, app_id: str, index_id: str,
+                             ds_id_list: List[str]) -> AsyncIterator[DocumentDetail]:
+        """Iterate documents for a given application,
+        index and list of data sources"""
+        for ds_id in ds_id_list:
+            async for doc in self._paginate(
+                    'list_documents', DocumentDetailsResponse, 'documentDetailList',
+                    applicationId=app_id, indexId=index_id,
+                    dataSourceIds=[ds_id]):  # API accepts list of size 1 only
+                yield doc
+
+    async def list_documents_by_datasource_type(
+            self, app_id: str,
+            ds_type: Optional[DataSourceEnum] = None) -> AsyncIterator[DocumentDetail]:
+        """Iterate documents for a given application and optional
+        datasource type (eg. CONFLUENCE)"""
+        topology = await self.get_topology(app_id)
+        for index_id, ds_id in topology.data_sources_by_type(ds_type):
+            async for doc in self.list_documents(app_id, index_id, [ds_id]):
+                yield doc
+
+    async def get_topology(self, app_id: str, refresh: bool = False) -> ApplicationTopology:
+        """Indices and data sources of an application, cached for the topology cache TTL"""
+        return await self._call('get_topology', app_id, refresh)
+
+    async def list_retrievers(self, app_id: str) -> AsyncIterator[Retriever]:
+        """Iterate retrievers for a given application"""
+        async for retriever in self._paginate(
+                'list_retrievers', ListRetrieversResponse, 'retrievers',
+                applicationId=app_id):
+            yield retriever
+
+    async def search_relevant_content(
+            self, query: str, app_id: str, retriever_id: str,
+            attribute_filter: Optional[dict] = None,
+            page_size: Optional[int] = None) -> AsyncIterator[RelevantContent]:
+        """Iterate passages relevant to a query, ranked by the retriever"""
+        params = await self._call(
+            '_search_params',
+            query, app_id, retriever_id, attribute_filter, page_size
+        )
+        async for passage in self._paginate(
+                'search_relevant_content', SearchRelevantContentResponse, 'relevantContent',
+                **params):
+            yield passage
+
+    async def list_conversations(self, app_id: str,
+                                 user_id: Optional[str] = None) -> AsyncIterator[Conversation]:
+        """Iterate conversations for a given application and user"""
+        params = await self._call('_add_user_id', {"applicationId": app_id}, user_id)
+        async for conversation in self._paginate(
+                'list_conversations', ListConversationsResponse, 'conversations',
+                **params):
+            yield conversation
+
+    async def list_conversations_page(
+            self, app_id: str, user_id: Optional[str] = None,
+            page_size: Optional[int] = None,
+            next_token: Optional[str] = None) -> ListConversationsResponse:
+        """Single page of conversations, and the token of the next page if any"""
+        return await self._call(
+            'list_conversations_page', app_id, user_id, page_size, next_token
+        )
+
+    async def delete_conversation(self, conversation_id: str, app_id: str,
+                                  user_id: Optional[str] = None) -> bool:
+        """Delete a conversation"""
+        return await self._call(
+            'delete_conversation', conversation_id, app_id, user_id
+        )
+
+    async def delete_conversations_by_age(self, app_id: str, user_id: Optional[str] = None,
+                                          age: Optional[timedelta] = None) -> bool:
+        """Delete conversations by age"""
+        return await self._call(
+            'delete_conversations_by_age', app_id, user_id, age
+        )
+
+    async def purge_conversations_by_age(
+            self, app_id: str, user_id: Optional[str] = None,
+            age: Optional[timedelta] = None,
+            max_workers: int = 8,
+            max_attempts: int = 5) -> ConversationPurgeSummary:
+        """Delete conversations by age with concurrent deleters"""
+        return await self._call(
+            'purge_conversations_by_age',
+            app_id, user_id, age, max_workers, max_attempts
+        )
+
+    async def chat_sync(
+            self, message: str, app_id: str,
+            user_id: Optional[str] = None,
+            conversation_id: Optional[str] = None,
+            prev_sys_message_id: Optional[str] = None,
+            attach_files: Optional[List[str]] = None,
+            chat_mode: str = ChatMode.retrieval) -> ChatSyncResponse:
+        """Facilitate call sync chat API"""
+        return await self._call(
+            'chat_sync',
+            message=message,
+            app_id=app_id,
+            user_id=user_id,
+            conversation_id=conversation_id,
+            prev_sys_message_id=prev_sys_message_id,
+            attach_files=attach_files,
+            chat_mode=chat_mode
+        )
+
+    async def chat_sync_ttp(
+            self, message: str, app_id: str,
+            conversation_id: Optional[str] = None,
+            prev_sys_message_id: Optional[str] = None,
+            attach_files: Optional[List[str]] = None,
+            chat_mode: str = ChatMode.retrieval) -> ChatSyncResponse:
+        """Facilitate call sync chat API with identity propagation. No user ID."""
+        return await self._call(
+            'chat_sync_ttp',
+            message=message,
+            app_id=app_id,
+            conversation_id=conversation_id,
+            prev_sys_message_id=prev_sys_message_id,
+            attach_files=attach_files,
+            chat_mode=chat_mode
+        )
+
+    async def get_chat_controls(self, app_id: str,
+                                refresh: bool = False) -> ChatControlsSnapshot:
+        """Chat controls fetched in one pass, cached for the chat controls cache TTL"""
+        return await self._call('get_chat_controls', app_id, refresh)
+
+    async def allow_ai_fallback(self, app_id: str, allow: bool = True) -> None:
+        """Enable/disable fallback to AI to use its knowledge to answer questions"""
+        await self._call('allow_ai_fallback', app_id, allow)
+
+    async def is_ai_fallback_allowed(self, app_id: str) -> bool:
+        """Find if allowed to fallback to AI knowledge to answer questions"""
+        return await self._call('is_ai_fallback_allowed', app_id)
+
+    async def allow_creator_mode(self, app_id: str, allow: bool = True) -> None:
+        """Enable/disable direct LLM access for creators"""
+        await self._call('allow_creator_mode', app_id, allow)
+
+    async def is_creator_mode_allowed(self, app_id: str) -> bool:
+        """Find if direct LLM access for creators is enabled"""
+        return await self._call('is_creator_mode_allowed', app_id)
+
+    async def create_custom_ds(self, app_id: str, index_id: str,
+                               name: str) -> CreateDataSourceResponse:
+        """Creates custom data source"""
+        return await self._call('create_custom_ds', app_id, index_id, name)
+
+    async def delete_ds(self, app_id: str, index_id: str, ds_id: str) -> None:
+        """Deletes a data source"""
+        await self._call('delete_ds', app_id, index_id, ds_id)
+
+    async def start_ds_sync_job(self, app_id: str, index_id: str,
+                                ds_id: str) -> StartDataSourceSyncJobResponse:
+        """Start data source sync job"""
+        return await self._call('start_ds_sync_job', app_id, index_id, ds_id)
+
+    async def stop_ds_sync_job(self, app_id: str, index_id: str, ds_id: str) -> None:
+        """Stop data source sync job"""
+        await self._call('stop_ds_sync_job', app_id, index_id, ds_id)
+
+    async def put_documents(self, app_id: str, index_id: str, sync_id: str,
+                            documents: dict):
+        """Puts documents to custom data source"""
+        return await self._call(
+            'put_documents', app_id, index_id, sync_id, documents
+        )
+
+    async def add_user_alias(self, email: str, alias: str, app_id: str,
+                             index_id: str, ds_id: str) -> dict:
+        """Creates user and/or update user alias"""
+        return await self._call(
+            'add_user_alias', email, alias, app_id, index_id, ds_id
+        )
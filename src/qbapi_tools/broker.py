@@ -0,0 +1,342 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=logging-fstring-interpolation
+
+"""Local credential broker shared by web application workers.
+
+The broker runs the IDC and STS token exchange once per sign-in, caches
+the resulting credentials until shortly before they expire and serves them
+to worker processes over a Unix domain socket, one JSON document per line.
+"""
+
+import os
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Literal, Optional
+
+from dotenv import dotenv_values
+from pydantic import BaseModel
+
+from qbapi_tools.access_helpers import (
+    OidcData,
+    get_cached_oidc_config,
+    get_idc_sts_id_context,
+    get_sts_credential,
+    refresh_oidc_id_token,
+    warm_up_token_exchange_clients,
+)
+from qbapi_tools.credentials import CredentialManager
+from qbapi_tools.exception import (
+    AccessHelperException,
+    CredentialRefreshException,
+)
+from qbapi_tools.log_config import get_logger
+
+logger = get_logger()
+
+BROKER_MAX_ENTRIES = 10000
+BROKER_SWEEP_INTERVAL = 60
+
+
+class BrokerConfig(BaseModel):
+    """Credential broker settings"""
+    socket_path: str
+    idc_provider_apl_arn: str
+    qb_sts_role: str
+    region_name: str
+    # Required to renew credentials with the IdP refresh token
+    issuer_url: Optional[str] = None
+    client_id: Optional[str] = None
+    client_secret: Optional[str] = None
+    # Users kept, least recently used are dropped first
+    max_entries: int = BROKER_MAX_ENTRIES
+    # Seconds a refresh token is assumed valid after it is issued
+    refresh_token_lifetime: float = 86400
+
+
+class BrokerRequest(BaseModel):
+    """Broker request message"""
+    op: Literal["exchange", "get", "evict"]
+    user_id: str
+    email: Optional[str] = None
+    id_token: Optional[str] = None
+    refresh_token: Optional[str] = None
+
+
+class BrokerResponse(BaseModel):
+    """Broker response message"""
+    status: Literal["ok", "not_found", "error"]
+    credential: Optional[dict] = None
+    email: Optional[str] = None
+    error: Optional[str] = None
+
+
+class _BrokerEntry:
+    """Cached credential manager, refresh token and profile for a user"""
+    def __init__(self, manager: CredentialManager, tokens: dict,
+                 email: Optional[str]) -> None:
+        self.manager = manager
+        self.tokens = tokens
+        self.email = email
+
+
+class CredentialBroker:
+    """Per user credential cache with single-flight token exchange.
+
+    An exchange always uses the tokens of the new sign-in and replaces the
+    user's entry. At most `max_entries` users are kept, least recently used
+    first out, and entries whose credential and refresh token have both
+    expired are dropped.
+    """
+    def __init__(self, config: BrokerConfig) -> None:
+        self.config = config
+        self._entries: OrderedDict[str, _BrokerEntry] = OrderedDict()
+        self._in_flight: dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._swept_at = time.monotonic()
+
+    def _refresher(self, tokens: dict) -> Callable[[], dict]:
+        def refresh() -> dict:
+            if not (tokens["refresh_token"] and self.config.issuer_url):
+                raise CredentialRefreshException("Credential cannot be renewed. Sign-in again.")
+            refreshed = refresh_oidc_id_token(
+                refresh_token=tokens["refresh_token"],
+                token_uri=get_cached_oidc_config(self.config.issuer_url)["token_endpoint"],
+                client_id=self.config.client_id,
+                client_secret=self.config.client_secret,
+                issuer_url=self.config.issuer_url
+            )
+            credential = self._exchange(refreshed.id_token)
+            tokens["refresh_token"] = refreshed.refresh_token
+            tokens["issued_at"] = time.monotonic()
+            return credential
+        return refresh
+
+    def _expired(self, entry: _BrokerEntry, now: float) -> bool:
+        expiration = entry.manager.expiration
+        if expiration and expiration > datetime.now(timezone.utc):
+            return False
+        if not (entry.tokens["refresh_token"] and self.config.issuer_url):
+            return True
+        return now - entry.tokens["issued_at"] > self.config.refresh_token_lifetime
+
+    def _store(self, user_id: str, entry: _BrokerEntry) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[user_id] = entry
+            self._entries.move_to_end(user_id)
+            if now - self._swept_at >= BROKER_SWEEP_INTERVAL:
+                self._swept_at = now
+                for expired in [cached_id for cached_id, cached in self._entries.items()
+                                if self._expired(cached, now)]:
+                    del self._entries[expired]
+            while len(self._entries) > self.config.max_entries:
+                self._entries.popitem(last=False)
+
+    def _exchange(self, id_token: str) -> dict:
+        sts_context = get_idc_sts_id_context(
+            self.config.idc_provider_apl_arn, id_token, self.config.region_name
+        )
+        return get_sts_credential(
+            self.config.qb_sts_role, sts_context, self.config.region_name
+        )
+
+    def exchange(self, request: BrokerRequest) -> BrokerResponse:
+        """Run the exchange for a sign-in, once for concurrent requests of a user"""
+        with self._lock:
+            future = self._in_flight.get(request.user_id)
+            owner = future is None
+            if owner:
+                future = self._in_flight[request.user_id] = Future()
+        if not owner:
+            return future.result()
+        try:
+            if not request.id_token:
+                raise AccessHelperException("Missing OIDC identity token.")
+            tokens = {"refresh_token": request.refresh_token, "issued_at": time.monotonic()}
+            manager = CredentialManager(
+                refresh=self._refresher(tokens),
+                credential=self._exchange(request.id_token)
+            )
+            entry = _BrokerEntry(manager, tokens, request.email)
+            self._store(request.user_id, entry)
+            response = self._serve(request.user_id, entry)
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.exception(ex.args[0] if ex.args else ex)
+            response = BrokerResponse(status="error", error=str(ex))
+        future.set_result(response)
+        with self._lock:
+            self._in_flight.pop(request.user_id, None)
+        return response
+
+    def _serve(self, user_id: str, entry: _BrokerEntry) -> BrokerResponse:
+        if self._expired(entry, time.monotonic()):
+            self._drop(user_id, entry)
+            return BrokerResponse(status="not_found")
+        try:
+            credential = entry.manager.get()
+        except CredentialRefreshException:
+            self._drop(user_id, entry)
+            return BrokerResponse(status="not_found")
+        return BrokerResponse(status="ok", credential=credential, email=entry.email)
+
+    def _drop(self, user_id: str, entry: _BrokerEntry) -> None:
+        """Forget an entry, unless a newer sign-in replaced it"""
+        with self._lock:
+            if self._entries.get(user_id) is entry:
+                del self._entries[user_id]
+
+    def get(self, user_id: str) -> BrokerResponse:
+        """Return cached credentials for a user"""
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if not entry:
+                return BrokerResponse(status="not_found")
+            self._entries.move_to_end(user_id)
+        return self._serve(user_id, entry)
+
+    def evict(self, user_id: str) -> BrokerResponse:
+        """Forget a user's credentials"""
+        with self._lock:
+            self._entries.pop(user_id, None)
+        return BrokerResponse(status="ok")
+
+    def handle(self, request: BrokerRequest) -> BrokerResponse:
+        """Dispatch a request"""
+        match request.op:
+            case "exchange":
+                return self.exchange(request)
+            case "get":
+                return self.get(request.user_id)
+            case "evict":
+                return self.evict(request.user_id)
+        return BrokerResponse(status="error", error=f"Unsupported operation '{request.op}'.")
+
+
+class _BrokerRequestHandler(socketserver.StreamRequestHandler):
+    """Reads one JSON request per line until the worker disconnects"""
+    server: "CredentialBrokerServer"
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = BrokerRequest.model_validate_json(line)
+                response = self.server.broker.handle(request)
+            except ValueError as ex:
+                response = BrokerResponse(status="error", error=str(ex))
+            self.wfile.write(response.model_dump_json().encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+class CredentialBrokerServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server for a CredentialBroker"""
+    daemon_threads = True
+
+    def __init__(self, broker: CredentialBroker) -> None:
+        self.broker = broker
+        socket_path = Path(broker.config.socket_path)
+        socket_path.unlink(missing_ok=True)
+        previous_umask = os.umask(0o077)  # socket readable by broker user only
+        try:
+            super().__init__(str(socket_path), _BrokerRequestHandler)
+        finally:
+            os.umask(previous_umask)
+
+
+class CredentialBrokerClient:
+    """Thin worker side client keeping one connection per thread"""
+    def __init__(self, socket_path: str, timeout: float = 30) -> None:
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            sock.connect(self.socket_path)
+            conn = self._local.conn = (sock, sock.makefile("rwb"))
+        return conn
+
+    def _close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if conn:
+            conn[1].close()
+            conn[0].close()
+
+    def _call(self, request: BrokerRequest) -> BrokerResponse:
+        payload = request.model_dump_json(exclude_none=True).encode("utf-8") + b"\n"
+        for attempt in range(2):
+            try:
+                _, stream = self._connection()
+                stream.write(payload)
+                stream.flush()
+                line = stream.readline()
+                if not line:
+                    raise ConnectionError("Credential broker closed the connection.")
+                return BrokerResponse.model_validate_json(line)
+            except OSError as ex:
+                self._close()
+                if attempt:
+                    raise AccessHelperException("Credential broker unavailable.") from ex
+        raise AccessHelperException("Credential broker unavailable.")
+
+    def exchange(self, user_id: str, oidc_data: OidcData) -> dict:
+        """Exchange an identity token for credentials, or reuse cached ones"""
+        response = self._call(BrokerRequest(
+            op="exchange",
+            user_id=user_id,
+            email=oidc_data.jwt_email,
+            id_token=oidc_data.id_token,
+            refresh_token=oidc_data.refresh_token
+        ))
+        if response.status != "ok":
+            raise AccessHelperException(response.error or "Credential exchange failed.")
+        return response.credential
+
+    def get(self, user_id: str) -> Optional[BrokerResponse]:
+        """Cached credentials and email for a user, None when unknown"""
+        response = self._call(BrokerRequest(op="get", user_id=user_id))
+        if response.status == "error":
+            raise AccessHelperException(response.error)
+        return response if response.status == "ok" else None
+
+    def evict(self, user_id: str) -> None:
+        """Forget a user's credentials"""
+        self._call(BrokerRequest(op="evict", user_id=user_id))
+
+
+def main():
+    """Run the credential broker using the web application env file"""
+    parser = argparse.ArgumentParser(description="Q Business credential broker")
+    parser.add_argument("--env", default="./webapp/config/.env",
+                        help="env file with IDC, STS role and OAuth client settings")
+    args = parser.parse_args()
+    config = dotenv_values(dotenv_path=Path(args.env).absolute())
+    broker_config = BrokerConfig(
+        socket_path=config.get("credential_broker_socket", "/tmp/qbapi-broker.sock"),  # nosec
+        idc_provider_apl_arn=config["idc_provider_apl_arn"],
+        qb_sts_role=config["qb_sts_role"],
+        region_name=config.get("region_name", os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')),
+        issuer_url=config.get("issuer_url"),
+        client_id=config.get("client_id"),
+        client_secret=config.get("client_secret"),
+    )
+    warm_up_token_exchange_clients(broker_config.region_name)
+    with CredentialBrokerServer(CredentialBroker(broker_config)) as server:
+        logger.info(f"Credential broker listening on '{broker_config.socket_path}'")
+        server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Reusable boto3 clients"""
+
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, Optional, Union
+
+import boto3
+import botocore.session
+
+from qbapi_tools.credentials import CredentialManager, credential_expiration
+from qbapi_tools.datamodel import ServiceConfig
+from qbapi_tools.decoding import response_parser_factory
+from qbapi_tools.rate_limit import attach_rate_limiter
+
+
+class AwsClientCache:
+    """Thread-safe cache of boto3 clients keyed by service and region.
+
+    boto3 clients are thread-safe once created, but creating them loads
+    the service model and endpoint resolver and is not thread-safe on a
+    shared session. Clients are therefore created once under a lock from
+    a private session and reused, each keeping its own connection pool.
+    Transport settings come from `service_config`, defaulting to the
+    "token_exchange" preset.
+    """
+    def __init__(self, session: Optional[boto3.session.Session] = None,
+                 service_config: Optional[ServiceConfig] = None) -> None:
+        self._session = session if session else boto3.session.Session()
+        self.service_config = service_config if service_config \
+            else ServiceConfig.preset("token_exchange")
+        parser_factory = response_parser_factory(self.service_config.decode_mode)
+        if parser_factory:
+            # pylint: disable-next=protected-access
+            self._session._session.register_component("response_parser_factory", parser_factory)
+        self._clients: dict[tuple[str, Optional[str], Optional[float]], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, service_name: str, region_name: Optional[str] = None,
+            timeout: Optional[float] = None) -> Any:
+        """Return the cached client for a service and region.
+
+        With `timeout`, the client makes a single attempt with connect and
+        read timeouts capped at `timeout` seconds.
+        """
+        key = (service_name, region_name, timeout)
+        client = self._clients.get(key)
+        if client:
+            return client
+        with self._lock:
+            if key not in self._clients:
+                update = {"service_name": service_name, "region_name": region_name}
+                if timeout:
+                    update.update(
+                        connect_timeout=min(self.service_config.connect_timeout, timeout),
+                        read_timeout=min(self.service_config.read_timeout, timeout),
+                        max_attempts=1
+                    )
+                client = self._session.client(
+                    **self.service_config.model_copy(update=update).client_kwargs()
+                )
+                attach_rate_limiter(client, self.service_config.priority)
+                self._clients[key] = client
+            return self._clients[key]
+
+    def warm_up(self, services: Iterable[str],
+                region_name: Optional[str] = None) -> None:
+        """Create clients ahead of first use"""
+        for service_name in services:
+            self.get(service_name, region_name)
+
+    def clear(self) -> None:
+        """Drop all cached clients"""
+        with self._lock:
+            self._clients.clear()
+
+
+_client_cache: Optional[AwsClientCache] = None
+_client_cache_lock = threading.Lock()
+
+
+def get_client_cache() -> AwsClientCache:
+    """Shared client cache used by access helpers"""
+    global _client_cache  # pylint: disable=global-statement
+    if _client_cache is None:
+        with _client_cache_lock:
+            if _client_cache is None:
+                _client_cache = AwsClientCache()
+    return _client_cache
+
+
+def configure_client_cache(cache: AwsClientCache) -> AwsClientCache:
+    """Replace the shared client cache used by access helpers"""
+    global _client_cache  # pylint: disable=global-statement
+    _client_cache = cache
+    return cache
+
+
+def credentials_identity(credentials: Union[CredentialManager, dict, None]) -> Optional[str]:
+    """Access key ID, or credential manager instance, identifying credentials"""
+    if isinstance(credentials, CredentialManager):
+        return f"manager:{id(credentials)}"
+    if credentials:
+        return credentials["AccessKeyId"]
+    return None
+
+
+class _PooledClient:
+    """Pool entry for a client bound to one set of credentials"""
+    __slots__ = ("client", "owner", "expires_at")
+
+    def __init__(self, client: Any, owner: Any, expires_at: Optional[datetime]) -> None:
+        self.client = client
+        # Keeps the credential manager alive so its id is not reused by another
+        self.owner = owner
+        self.expires_at = expires_at
+
+
+class ServiceClientPool:
+    """Thread-safe LRU pool of service clients keyed by credentials.
+
+    Clients are keyed by (region, service, access key ID, transport
+    settings), using the credential manager instance in place of the
+    access key ID for refreshable credentials, so handles
+    built per request reuse the client and its warm connection pool.
+    Entries whose static credentials expire are evicted, and the least
+    recently used entry is dropped once `max_size` is reached. All
+    clients share one service model loader.
+    """
+    def __init__(self, max_size: int = 256,
+                 expiry_margin: timedelta = timedelta(minutes=1)) -> None:
+        self.max_size = max_size
+        self.expiry_margin = expiry_margin
+        self._clients: OrderedDict[tuple, _PooledClient] = OrderedDict()
+        self._lock = threading.Lock()
+        self._loader = botocore.session.get_session().get_component("data_loader")
+
+    def _expired(self, entry: _PooledClient, now: datetime) -> bool:
+        return entry.expires_at is not None and entry.expires_at - self.expiry_margin <= now
+
+    def _create(self, credentials: Union[CredentialManager, dict, None],
+                service_config: ServiceConfig) -> Any:
+        botocore_session = botocore.session.get_session()
+        botocore_session.register_component("data_loader", self._loader)
+        parser_factory = response_parser_factory(service_config.decode_mode)
+        if parser_factory:
+            botocore_session.register_component("response_parser_factory", parser_factory)
+        if isinstance(credentials, CredentialManager):
+            # pylint: disable-next=protected-access
+            botocore_session._credentials = credentials.botocore_credentials()
+        elif credentials:
+            botocore_session.set_credentials(
+                access_key=credentials["AccessKeyId"],
+                secret_key=credentials["SecretAccessKey"],
+                token=credentials["SessionToken"]
+            )
+        client = boto3.Session(botocore_session=botocore_session).client(
+            **service_config.client_kwargs()
+        )
+        attach_rate_limiter(client, service_config.priority)
+        return client
+
+    def _lookup(self, key: tuple, credentials: Any, now: datetime) -> Optional[Any]:
+        entry = self._clients.get(key)
+        if not entry or self._expired(entry, now):
+            return None
+        if isinstance(credentials, CredentialManager) and entry.owner is not credentials:
+            return None
+        self._clients.move_to_end(key)
+        return entry.client
+
+    def get(self, credentials: Union[CredentialManager, dict, None] = None,
+            service_config: Optional[ServiceConfig] = None) -> Any:
+        """Return the pooled client for credentials and service settings"""
+        service_config = service_config if service_config else ServiceConfig()
+        key = (service_config.region_name, service_config.service_name,
+               credentials_identity(credentials), service_config.transport_key())
+        now = datetime.now(timezone.utc)
+        with self._lock:
+            client = self._lookup(key, credentials, now)
+        if client:
+            return client
+        # Sessions are private to each client, creation does not hold the lock
+        client = self._create(credentials, service_config)
+        managed = isinstance(credentials, CredentialManager)
+        with self._lock:
+            existing = self._lookup(key, credentials, now)
+            if existing:
+                return existing
+            self._clients[key] = _PooledClient(
+                client,
+                credentials if managed else None,
+                None if managed else credential_expiration(credentials)
+            )
+            self._evict(now)
+        return client
+
+    def _evict(self, now: datetime) -> None:
+        for key in [key for key, entry in self._clients.items() if self._expired(entry, now)]:
+            del self._clients[key]
+        while len(self._clients) > self.max_size:
+            self._clients.popitem(last=False)
+
+    def discard(self, credentials: Union[CredentialManager, dict]) -> None:
+        """Drop clients bound to credentials"""
+        identity = credentials_identity(credentials)
+        with self._lock:
+            for key in [key for key in self._clients if key[2] == identity]:
+                del self._clients[key]
+
+    def __len__(self) -> int:
+        return len(self._clients)
+
+    def clear(self) -> None:
+        """Drop all pooled clients"""
+        with self._lock:
+            self._clients.clear()
+
+
+_service_client_pool: Optional[ServiceClientPool] = None
+
+
+def get_service_client_pool() -> ServiceClientPool:
+    """Shared client pool used by API helpers"""
+    global _service_client_pool  # pylint: disable=global-statement
+    if _service_client_pool is None:
+        with _client_cache_lock:
+            if _service_client_pool is None:
+                _service_client_pool = ServiceClientPool()
+    return _service_client_pool
+
+
+def configure_service_client_pool(pool: ServiceClientPool) -> ServiceClientPool:
+    """Replace the shared client pool used by API helpers"""
+    global _service_client_pool  # pylint: disable=global-statement
+    _service_client_pool = pool
+    return pool
@@ -0,0 +1,146 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=logging-fstring-interpolation
+
+"""Temporary credential lifecycle management"""
+
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from botocore.credentials import RefreshableCredentials
+
+from qbapi_tools.log_config import get_logger
+from qbapi_tools.exception import (
+    CredentialRefreshException,
+)
+
+logger = get_logger()
+
+
+def credential_expiration(credential: dict) -> Optional[datetime]:
+    """Expiration of an STS credential dict as an aware datetime"""
+    expiration = credential.get("Expiration") if credential else None
+    if isinstance(expiration, str):
+        expiration = datetime.fromisoformat(expiration)
+    if expiration and expiration.tzinfo is None:
+        expiration = expiration.replace(tzinfo=timezone.utc)
+    return expiration
+
+
+class _ManagedRefreshableCredentials(RefreshableCredentials):
+    """botocore credentials refreshed through a CredentialManager"""
+    def __init__(self, manager: "CredentialManager", **kwargs) -> None:
+        super().__init__(**kwargs)
+        self._advisory_refresh_timeout = manager.refresh_ahead.total_seconds()
+        self._mandatory_refresh_timeout = manager.mandatory_refresh.total_seconds()
+
+
+class CredentialManager:
+    """Tracks STS credential expiry and refreshes ahead of time.
+
+    Inside the `refresh_ahead` window a single caller refreshes while the
+    others keep using the current credential. Inside the
+    `mandatory_refresh` window, or once expired, callers wait for the one
+    in-flight refresh instead of starting their own.
+    """
+    def __init__(self, refresh: Callable[[], dict],
+                 credential: Optional[dict] = None,
+                 refresh_ahead: timedelta = timedelta(minutes=15),
+                 mandatory_refresh: timedelta = timedelta(minutes=5)) -> None:
+        self._refresh = refresh
+        self._credential = credential
+        self.refresh_ahead = refresh_ahead
+        self.mandatory_refresh = mandatory_refresh
+        self._lock = threading.Lock()
+        self._refreshed = threading.Condition(self._lock)
+        self._refreshing = False
+
+    @property
+    def expiration(self) -> Optional[datetime]:
+        """Expiration of the current credential"""
+        return credential_expiration(self._credential)
+
+    def _remaining(self) -> Optional[timedelta]:
+        expiration = self.expiration
+        if not expiration:
+            return None
+        return expiration - datetime.now(timezone.utc)
+
+    def _usable(self) -> bool:
+        remaining = self._remaining()
+        return remaining is not None and remaining > timedelta(0)
+
+    def get(self) -> dict:
+        """Return a credential, refreshing it if it is about to expire"""
+        with self._lock:
+            remaining = self._remaining()
+            if remaining is not None and remaining > self.refresh_ahead:
+                return self._credential
+            blocking = remaining is None or remaining <= self.mandatory_refresh
+            if self._refreshing:
+                if not blocking:
+                    return self._credential
+                while self._refreshing:
+                    self._refreshed.wait()
+                if self._usable():
+                    return self._credential
+                raise CredentialRefreshException("Unable to refresh expired credential.")
+            self._refreshing = True
+        return self._run_refresh(blocking)
+
+    def refresh(self) -> dict:
+        """Force a refresh, joining one already in flight"""
+        with self._lock:
+            if self._refreshing:
+                while self._refreshing:
+                    self._refreshed.wait()
+                if self._usable():
+                    return self._credential
+                raise CredentialRefreshException("Unable to refresh expired credential.")
+            self._refreshing = True
+        return self._run_refresh(True)
+
+    def _run_refresh(self, blocking: bool) -> dict:
+        try:
+            credential = self._refresh()
+            if not credential_expiration(credential):
+                raise CredentialRefreshException("Refreshed credential is missing expiration.")
+        except Exception as ex:
+            with self._lock:
+                self._refreshing = False
+                self._refreshed.notify_all()
+                if not blocking or self._usable():
+                    logger.warning(f"Credential refresh failed, using current credential: {ex}")
+                    return self._credential
+            if isinstance(ex, CredentialRefreshException):
+                raise
+            raise CredentialRefreshException("Unable to refresh expired credential.") from ex
+        with self._lock:
+            self._credential = credential
+            self._refreshing = False
+            self._refreshed.notify_all()
+        return credential
+
+    def _metadata(self) -> dict:
+        credential = self.get()
+        return {
+            "access_key": credential["AccessKeyId"],
+            "secret_key": credential["SecretAccessKey"],
+            "token": credential["SessionToken"],
+            "expiry_time": credential_expiration(credential).isoformat(),
+        }
+
+    def botocore_credentials(self) -> RefreshableCredentials:
+        """botocore refreshable credentials backed by this manager"""
+        metadata = self._metadata()
+        return _ManagedRefreshableCredentials(
+            manager=self,
+            access_key=metadata["access_key"],
+            secret_key=metadata["secret_key"],
+            token=metadata["token"],
+            expiry_time=credential_expiration(self._credential),
+            refresh_using=self._metadata,
+            method="qbapi-credential-manager",
+        )
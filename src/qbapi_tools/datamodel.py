@@ -7,15 +7,119 @@
 
 from pathlib import Path
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Optional, List
 from enum import Enum
-from pydantic import BaseModel, Field, computed_field
+from pydantic import BaseModel, Field, PrivateAttr, computed_field
+from botocore.config import Config
+
+
+class RetryModeEnum(str, Enum):
+    """botocore retry modes"""
+    legacy = 'legacy'
+    standard = 'standard'
+    adaptive = 'adaptive'
+
+
+class DecodeModeEnum(str, Enum):
+    """Response decoding modes"""
+    strict = 'strict'
+    fast = 'fast'
+
+
+class RequestPriorityEnum(str, Enum):
+    """Rate limiter priority of a client's calls"""
+    interactive = 'interactive'
+    background = 'background'
 
 
 class ServiceConfig(BaseModel):
-    """AWS service settings for boto3 client session"""
+    """AWS service settings for boto3 client session.
+
+    Transport settings default to botocore defaults. Use `preset` for
+    tuned profiles such as "interactive_chat" or "bulk_admin".
+    `decode_mode` "fast" parses epoch timestamps as UTC datetimes instead
+    of local time, which is several times cheaper for large listings.
+    `priority` orders calls waiting on the shared rate limiter, if any.
+    """
     service_name: Optional[str] = "qbusiness"
     region_name: Optional[str] = None
+    endpoint_url: Optional[str] = None
+    max_pool_connections: int = Field(default=10, ge=1)
+    connect_timeout: float = Field(default=60, gt=0)
+    read_timeout: float = Field(default=60, gt=0)
+    tcp_keepalive: bool = False
+    retry_mode: Optional[RetryModeEnum] = None
+    max_attempts: Optional[int] = Field(default=None, ge=1)
+    decode_mode: DecodeModeEnum = DecodeModeEnum.strict
+    priority: RequestPriorityEnum = RequestPriorityEnum.interactive
+
+    @classmethod
+    def preset(cls, name: str, **overrides) -> 'ServiceConfig':
+        """Named transport profile, with optional field overrides"""
+        if name not in SERVICE_CONFIG_PRESETS:
+            raise ValueError(f"Unknown service config preset '{name}'.")
+        return cls(**{**SERVICE_CONFIG_PRESETS[name], **overrides})
+
+    def transport_key(self) -> tuple:
+        """Hashable transport settings, excluding service and region"""
+        return tuple(self.model_dump(exclude={"service_name", "region_name"}).values())
+
+    def botocore_config(self) -> Config:
+        """botocore client configuration"""
+        retries = {}
+        if self.retry_mode:
+            retries["mode"] = self.retry_mode.value
+        if self.max_attempts:
+            retries["total_max_attempts"] = self.max_attempts
+        return Config(
+            max_pool_connections=self.max_pool_connections,
+            connect_timeout=self.connect_timeout,
+            read_timeout=self.read_timeout,
+            tcp_keepalive=self.tcp_keepalive,
+            retries=retries if retries else None,
+        )
+
+    def client_kwargs(self) -> dict:
+        """Keyword arguments for boto3 `client()`"""
+        kwargs = {
+            "service_name": self.service_name,
+            "region_name": self.region_name,
+            "config": self.botocore_config(),
+        }
+        if self.endpoint_url:
+            kwargs["endpoint_url"] = self.endpoint_url
+        return kwargs
+
+
+SERVICE_CONFIG_PRESETS: dict[str, dict] = {
+    # Fail fast on connect, leave time for generated answers
+    "interactive_chat": {
+        "connect_timeout": 3.05,
+        "read_timeout": 120,
+        "tcp_keepalive": True,
+        "retry_mode": RetryModeEnum.standard,
+        "max_attempts": 2,
+    },
+    # Token exchange calls answer quickly
+    "token_exchange": {
+        "connect_timeout": 3.05,
+        "read_timeout": 15,
+        "tcp_keepalive": True,
+        "retry_mode": RetryModeEnum.standard,
+        "max_attempts": 3,
+    },
+    # Concurrent listing and sync jobs, client side throttling
+    "bulk_admin": {
+        "max_pool_connections": 64,
+        "connect_timeout": 10,
+        "read_timeout": 60,
+        "tcp_keepalive": True,
+        "retry_mode": RetryModeEnum.adaptive,
+        "max_attempts": 10,
+        "decode_mode": DecodeModeEnum.fast,
+        "priority": RequestPriorityEnum.background,
+    },
+}
 
 
 class DataSourceEnum(str, Enum):
@@ -122,6 +226,35 @@ class ListIndicesResponse(BaseModel):
     indices: List[Index] = Field(default_factory=list)
 
 
+class IndexTopology(BaseModel):
+    """Index and its data sources"""
+    index: Index
+    dataSources: List[DataSource] = Field(default_factory=list)
+
+
+class ApplicationTopology(BaseModel):
+    """Application indices and data sources"""
+    applicationId: str
+    indices: List[IndexTopology] = Field(default_factory=list)
+    _all: list[tuple[str, str]] = PrivateAttr(default_factory=list)
+    _by_type: dict[str, list[tuple[str, str]]] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, context: Any, /) -> None:
+        for idx in self.indices:
+            for ds in idx.dataSources:
+                pair = (idx.index.indexId, ds.dataSourceId)
+                self._all.append(pair)
+                self._by_type.setdefault(ds.type, []).append(pair)
+
+    def data_sources_by_type(
+            self, ds_type: Optional[DataSourceEnum] = None) -> List[tuple[str, str]]:
+        """(index ID, data source ID) pairs, optionally of one data source type"""
+        if ds_type is None:
+            return list(self._all)
+        key = ds_type.value if isinstance(ds_type, Enum) else ds_type
+        return list(self._by_type.get(key, ()))
+
+
 class DocumentIndexError(BaseModel):
     """Document indexing error"""
     errorCode: Optional[str] = None
@@ -155,6 +288,27 @@ class ChatControlConfigResponse(BaseModel):
     creatorModeConfiguration: Optional[CreatorModeConfiguration] = None
 
 
+class ChatControlsSnapshot(BaseModel):
+    """Chat controls of an application, merged from all configuration pages"""
+    applicationId: str
+    responseScope: Optional[AIScope] = None
+    creatorModeConfiguration: Optional[CreatorModeConfiguration] = None
+
+    @property
+    def ai_fallback_allowed(self) -> Optional[bool]:
+        """True when AI knowledge may answer questions, None if scope is not set"""
+        if not self.responseScope:
+            return None
+        return self.responseScope == AIScope.extended
+
+    @property
+    def creator_mode_allowed(self) -> Optional[bool]:
+        """True when direct LLM access for creators is enabled, None if not set"""
+        if not self.creatorModeConfiguration:
+            return None
+        return self.creatorModeConfiguration.creatorModeControl == "ENABLED"
+
+
 class Conversation(BaseModel):
     """conversation detail"""
     conversationId: str
@@ -168,6 +322,76 @@ class ListConversationsResponse(BaseModel):
     conversations: List[Conversation] = Field(default_factory=list)
 
 
+class ConversationDeleteFailure(BaseModel):
+    """Conversation that could not be deleted"""
+    conversationId: str
+    errorCode: str
+    errorMessage: Optional[str] = None
+    attempts: int
+
+
+class ConversationPurgeSummary(BaseModel):
+    """Outcome of deleting conversations by age.
+
+    `skipped` are conversations newer than the cutoff, `notFound` expired
+    conversations already deleted by the time of their delete call.
+    `listingError` is set when listing stopped before the last page.
+    """
+    applicationId: str
+    deleted: List[str] = Field(default_factory=list)
+    notFound: List[str] = Field(default_factory=list)
+    skipped: List[str] = Field(default_factory=list)
+    failed: List[ConversationDeleteFailure] = Field(default_factory=list)
+    listingError: Optional[str] = None
+    retries: int = 0
+    elapsedSeconds: float = 0.0
+    deleteSeconds: float = 0.0
+
+    @property
+    def expired(self) -> int:
+        """Number of listed conversations older than the cutoff"""
+        return len(self.deleted) + len(self.notFound) + len(self.failed)
+
+    @property
+    def succeeded(self) -> bool:
+        """True when all conversations were listed and none failed to delete"""
+        return self.listingError is None and not self.failed
+
+
+class UserRetentionResult(BaseModel):
+    """Retention sweep outcome for a user, one checkpoint record.
+
+    `expired` counts conversations older than the cutoff and `skipped`
+    newer ones, in both dry and real runs.
+    """
+    userId: str
+    dryRun: bool = False
+    expired: int = 0
+    deleted: int = 0
+    skipped: int = 0
+    failed: List[str] = Field(default_factory=list)
+    error: Optional[str] = None
+    elapsedSeconds: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        """True when the user needs no further sweep"""
+        return self.error is None and not self.failed
+
+
+class RetentionSweepSummary(BaseModel):
+    """Outcome of a retention sweep across users"""
+    applicationId: str
+    dryRun: bool = False
+    users: int = 0
+    resumedUsers: int = 0
+    expired: int = 0
+    deleted: int = 0
+    failedConversations: int = 0
+    failedUsers: List[str] = Field(default_factory=list)
+    elapsedSeconds: float = 0.0
+
+
 class TextMessageSegment(BaseModel):
     """Source attribution text message segment"""
     beginOffset: int
@@ -193,6 +417,51 @@ class ChatSyncResponse(BaseModel):
     sourceAttributions: List[SourceAttribution] = Field(default_factory=list)
 
 
+class Retriever(BaseModel):
+    """List retrievers response item"""
+    applicationId: str
+    retrieverId: str
+    type: Optional[str] = None
+    status: Optional[str] = None
+    displayName: Optional[str] = None
+
+
+class ListRetrieversResponse(BaseModel):
+    """List retrievers response object"""
+    nextToken: Optional[str] = None
+    retrievers: List[Retriever] = Field(default_factory=list)
+
+
+class ScoreAttributes(BaseModel):
+    """Relevance score of a passage"""
+    scoreConfidence: Optional[str] = None
+
+
+class RelevantContent(BaseModel):
+    """Search relevant content response item, a ranked passage"""
+    content: Optional[str] = None
+    documentId: Optional[str] = None
+    documentTitle: Optional[str] = None
+    documentUri: Optional[str] = None
+    documentAttributes: List[dict] = Field(default_factory=list)
+    scoreAttributes: Optional[ScoreAttributes] = None
+
+    @property
+    def source_attribution(self) -> SourceAttribution:
+        """Passage as a chat source attribution"""
+        return SourceAttribution(
+            title=self.documentTitle or self.documentId or "",
+            url=self.documentUri,
+            snippet=self.content
+        )
+
+
+class SearchRelevantContentResponse(BaseModel):
+    """Search relevant content response object"""
+    nextToken: Optional[str] = None
+    relevantContent: List[RelevantContent] = Field(default_factory=list)
+
+
 class ChatAttachment(BaseModel):
     """Chat file attachment"""
     filename: str
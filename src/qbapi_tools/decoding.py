@@ -0,0 +1,32 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Service response decoding modes"""
+
+from datetime import datetime, timezone
+from typing import Optional
+
+from botocore.parsers import ResponseParserFactory
+from botocore.utils import parse_timestamp
+
+from qbapi_tools.datamodel import DecodeModeEnum
+
+
+def fast_timestamp_parser(value) -> datetime:
+    """Epoch timestamps as UTC datetimes, other formats as botocore does.
+
+    botocore converts each epoch timestamp to local time using a new
+    dateutil tzlocal instance, which dominates parsing of large listings.
+    """
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc)
+    return parse_timestamp(value)
+
+
+def response_parser_factory(decode_mode: DecodeModeEnum) -> Optional[ResponseParserFactory]:
+    """botocore parser factory for a decode mode, None for botocore defaults"""
+    if decode_mode != DecodeModeEnum.fast:
+        return None
+    factory = ResponseParserFactory()
+    factory.set_parser_defaults(timestamp_parser=fast_timestamp_parser)
+    return factory
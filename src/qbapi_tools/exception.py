@@ -14,3 +14,7 @@ class ChatSyncConversationMissingParameters(Exception):
 
 class AccessHelperException(Exception):
     """Access helper exception"""
+
+
+class CredentialRefreshException(AccessHelperException):
+    """Raised when temporary credentials cannot be refreshed"""
@@ -0,0 +1,203 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Hedged requests for idempotent read calls"""
+
+import time
+import threading
+import contextvars
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Iterable, Optional
+
+from pydantic import BaseModel
+
+# Read only operations, safe to send twice
+HEDGEABLE_OPERATIONS = frozenset((
+    "get_application", "get_index", "get_data_source", "get_user",
+    "get_chat_controls_configuration", "list_applications", "list_indices",
+    "list_data_sources", "list_documents", "list_conversations", "list_messages",
+    "list_retrievers", "search_relevant_content",
+))
+
+
+class HedgeMetrics(BaseModel):
+    """Hedging counters of an operation"""
+    operation: str
+    calls: int
+    hedges: int
+    hedge_wins: int
+    hedge_rate: float
+    saturated: int = 0
+    threshold_ms: Optional[float] = None
+
+
+class _LatencyTracker:
+    """Sliding window of call durations with a cached percentile"""
+    def __init__(self, window: int, percentile: float) -> None:
+        self.percentile = percentile
+        self._samples: deque[float] = deque(maxlen=window)
+        self._threshold: Optional[float] = None
+        self._since_update = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Add a call duration"""
+        with self._lock:
+            self._samples.append(seconds)
+            self._since_update += 1
+            if self._threshold is None or self._since_update >= 10:
+                ordered = sorted(self._samples)
+                self._threshold = ordered[min(len(ordered) - 1,
+                                              int(len(ordered) * self.percentile / 100))]
+                self._since_update = 0
+
+    def threshold(self, min_samples: int) -> Optional[float]:
+        """Current percentile, None until `min_samples` durations are known"""
+        if len(self._samples) < min_samples:
+            return None
+        return self._threshold
+
+
+class _OperationStats:
+    """Per operation counters"""
+    def __init__(self, tracker: _LatencyTracker) -> None:
+        self.tracker = tracker
+        self.calls = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.saturated = 0
+
+
+class HedgingPolicy:
+    """Sends a second attempt when a read call exceeds its tracked p95.
+
+    The first response wins; the slower attempt completes in the
+    background and its result is dropped. Hedges are only sent for
+    `operations`, once `min_samples` durations are known, and while they
+    stay under `max_extra_load` of the calls made through the policy.
+    Primary attempts run on `max_workers` threads and hedges on their
+    own `max_hedge_workers` threads, and neither queues: without a free
+    worker a primary runs on the caller's thread and a hedge is skipped,
+    and the call counts as saturated.
+    """
+    def __init__(self, operations: Iterable[str] = HEDGEABLE_OPERATIONS,
+                 percentile: float = 95, window: int = 200, min_samples: int = 20,
+                 min_delay: float = 0.05, max_extra_load: float = 0.1,
+                 max_workers: int = 32, max_hedge_workers: int = 8) -> None:
+        self.operations = frozenset(operations)
+        self.percentile = percentile
+        self.window = window
+        self.min_samples = min_samples
+        self.min_delay = min_delay
+        self.max_extra_load = max_extra_load
+        self._stats: dict[str, _OperationStats] = {}
+        self._calls = 0
+        self._hedges = 0
+        self._lock = threading.Lock()
+        # Sized for both worker groups, so submitted attempts never queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers + max_hedge_workers,
+                                            thread_name_prefix="hedged-read")
+        self._primary_workers = threading.BoundedSemaphore(max_workers)
+        self._hedge_workers = threading.BoundedSemaphore(max_hedge_workers)
+
+    def _operation_stats(self, operation: str) -> _OperationStats:
+        stats = self._stats.get(operation)
+        if stats:
+            return stats
+        with self._lock:
+            if operation not in self._stats:
+                self._stats[operation] = _OperationStats(
+                    _LatencyTracker(self.window, self.percentile)
+                )
+            return self._stats[operation]
+
+    def _timed(self, stats: _OperationStats, func: Callable[..., Any], **params) -> Any:
+        started = time.perf_counter()
+        result = func(**params)
+        stats.tracker.record(time.perf_counter() - started)
+        return result
+
+    def _run_on_worker(self, workers: threading.BoundedSemaphore, stats: _OperationStats,
+                       func: Callable[..., Any], **params) -> Any:
+        try:
+            return self._timed(stats, func, **params)
+        finally:
+            workers.release()
+
+    def _submit(self, workers: threading.BoundedSemaphore, stats: _OperationStats,
+                func: Callable[..., Any], **params) -> Optional[Future]:
+        """Run an attempt on a free worker of a group, None when all are busy"""
+        if not workers.acquire(blocking=False):
+            with self._lock:
+                stats.saturated += 1
+            return None
+        return self._executor.submit(
+            contextvars.copy_context().run, self._run_on_worker, workers, stats, func, **params
+        )
+
+    def _allow_hedge(self) -> bool:
+        with self._lock:
+            if self._hedges + 1 > self.max_extra_load * self._calls:
+                return False
+            self._hedges += 1
+            return True
+
+    def call(self, client: Any, operation: str, **params) -> Any:
+        """Call a client method, hedging it when eligible"""
+        func = getattr(client, operation)
+        if operation not in self.operations:
+            return func(**params)
+        stats = self._operation_stats(operation)
+        with self._lock:
+            self._calls += 1
+            stats.calls += 1
+        threshold = stats.tracker.threshold(self.min_samples)
+        if threshold is None:
+            return self._timed(stats, func, **params)
+
+        primary = self._submit(self._primary_workers, stats, func, **params)
+        if primary is None:
+            return self._timed(stats, func, **params)
+        done, _ = wait([primary], timeout=max(threshold, self.min_delay))
+        if done or not self._allow_hedge():
+            return primary.result()
+        hedge = self._submit(self._hedge_workers, stats, func, **params)
+        if hedge is None:
+            with self._lock:
+                self._hedges -= 1
+            return primary.result()
+        with self._lock:
+            stats.hedges += 1
+        pending = {primary, hedge}
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        with self._lock:
+                            stats.hedge_wins += 1
+                    return future.result()
+                first_error = first_error or future.exception()
+        raise first_error
+
+    def metrics(self) -> dict[str, HedgeMetrics]:
+        """Calls, hedges and current hedge threshold per operation"""
+        metrics = {}
+        for operation, stats in list(self._stats.items()):
+            threshold = stats.tracker.threshold(self.min_samples)
+            metrics[operation] = HedgeMetrics(
+                operation=operation,
+                calls=stats.calls,
+                hedges=stats.hedges,
+                hedge_wins=stats.hedge_wins,
+                hedge_rate=stats.hedges / stats.calls if stats.calls else 0.0,
+                saturated=stats.saturated,
+                threshold_ms=threshold * 1000 if threshold is not None else None,
+            )
+        return metrics
+
+    def shutdown(self) -> None:
+        """Stop worker threads once in-flight calls complete"""
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,158 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Pooled keep-alive HTTP sessions for identity provider (IdP) calls"""
+
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from pydantic import BaseModel
+
+
+class HttpPoolConfig(BaseModel):
+    """Connection pool, timeout and retry settings for IdP sessions"""
+    pool_connections: int = 4
+    pool_maxsize: int = 20
+    pool_block: bool = False
+    connect_timeout: float = 3.05
+    read_timeout: float = 30
+    max_retries: int = 3
+    backoff_factor: float = 0.3
+    backoff_jitter: float = 0.5
+    status_forcelist: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+    @property
+    def timeout(self) -> tuple[float, float]:
+        """requests style (connect, read) timeout"""
+        return (self.connect_timeout, self.read_timeout)
+
+
+class PoolStats(BaseModel):
+    """Connection reuse counters for a host"""
+    host: str
+    requests: int = 0
+    hits: int = 0
+    misses: int = 0
+
+
+class _IdpRetry(Retry):
+    """Retry policy that also retries non-idempotent requests on HTTP 429.
+
+    A throttled request was not processed by the server, so it is safe to
+    repeat even for a token endpoint POST. Other retryable status codes
+    apply to idempotent methods only, since repeating an authorization
+    code exchange after a 5xx would fail with an invalid grant anyway.
+    """
+    def is_retry(self, method: str, status_code: int,
+                 has_retry_after: bool = False) -> bool:
+        if status_code == 429 and self.total:
+            return True
+        return super().is_retry(method, status_code, has_retry_after)
+
+
+class HttpSessionPool:
+    """Thread-safe registry of keep-alive sessions, one per host"""
+    def __init__(self, config: Optional[HttpPoolConfig] = None) -> None:
+        self.config = config if config else HttpPoolConfig()
+        self._sessions: dict[str, requests.Session] = {}
+        self._lock = threading.Lock()
+
+    def _new_session(self) -> requests.Session:
+        retry = _IdpRetry(
+            total=self.config.max_retries,
+            backoff_factor=self.config.backoff_factor,
+            backoff_jitter=self.config.backoff_jitter,
+            status_forcelist=self.config.status_forcelist,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=self.config.pool_connections,
+            pool_maxsize=self.config.pool_maxsize,
+            pool_block=self.config.pool_block,
+            max_retries=retry,
+        )
+        session = requests.Session()
+        # Sessions are shared by all users, never keep IdP cookies
+        session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def session(self, url: str) -> requests.Session:
+        """Return the shared session for the host of a url"""
+        parts = urlsplit(url)
+        host = f"{parts.scheme}://{parts.netloc}"
+        session = self._sessions.get(host)
+        if session:
+            return session
+        with self._lock:
+            if host not in self._sessions:
+                self._sessions[host] = self._new_session()
+            return self._sessions[host]
+
+    def request(self, method: str, url: str, timeout=None,
+                **kwargs) -> requests.Response:
+        """Send a request on the pooled session for the url host"""
+        return self.session(url).request(
+            method,
+            url,
+            timeout=timeout if timeout else self.config.timeout,
+            **kwargs
+        )
+
+    def stats(self) -> dict[str, PoolStats]:
+        """Connection pool hit/miss counters keyed by host"""
+        with self._lock:
+            sessions = list(self._sessions.items())
+        stats = {}
+        for host, session in sessions:
+            host_stats = PoolStats(host=host)
+            adapter = session.get_adapter(host)
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                host_stats.requests += pool.num_requests
+                host_stats.misses += pool.num_connections
+            host_stats.hits = max(host_stats.requests - host_stats.misses, 0)
+            stats[host] = host_stats
+        return stats
+
+    def close(self) -> None:
+        """Close all sessions and their pooled connections"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
+
+
+_http_pool: Optional[HttpSessionPool] = None
+_http_pool_lock = threading.Lock()
+
+
+def get_http_pool() -> HttpSessionPool:
+    """Shared session pool used by access helpers"""
+    global _http_pool  # pylint: disable=global-statement
+    if _http_pool is None:
+        with _http_pool_lock:
+            if _http_pool is None:
+                _http_pool = HttpSessionPool()
+    return _http_pool
+
+
+def configure_http_pool(config: HttpPoolConfig) -> HttpSessionPool:
+    """Replace the shared session pool with one using the given settings"""
+    global _http_pool  # pylint: disable=global-statement
+    with _http_pool_lock:
+        previous, _http_pool = _http_pool, HttpSessionPool(config)
+    if previous:
+        previous.close()
+    return _http_pool
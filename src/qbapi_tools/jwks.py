@@ -0,0 +1,116 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=logging-fstring-interpolation
+
+"""JSON Web Key Set (JWKS) cache for token signature verification"""
+
+import time
+import threading
+from typing import Optional
+
+import jwt
+
+from qbapi_tools.log_config import get_logger
+from qbapi_tools.exception import (
+    AccessHelperException,
+)
+from qbapi_tools.http_pool import get_http_pool
+
+logger = get_logger()
+
+
+class JwksCache:
+    """In-process signing key cache for a JWKS endpoint.
+
+    Parsed public keys are kept indexed by key ID (kid). The key set is
+    fetched again only when a token references an unknown kid, at most
+    once per `min_refetch_interval`, or once it is older than `max_age`.
+    Failed fetches are retried at most once per `min_refetch_interval`.
+    """
+    def __init__(self, jwks_uri: str, min_refetch_interval: float = 60,
+                 max_age: float = 86400, timeout: Optional[float] = None) -> None:
+        self.jwks_uri = jwks_uri
+        self.min_refetch_interval = min_refetch_interval
+        self.max_age = max_age
+        self.timeout = timeout
+        self._keys: dict[Optional[str], jwt.PyJWK] = {}
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _fetch(self) -> None:
+        resp = get_http_pool().request(
+            "GET",
+            self.jwks_uri,
+            headers={'Accept': 'application/json'},
+            timeout=self.timeout
+        )
+        if resp.status_code != 200:
+            raise AccessHelperException("Unable to retrieve JSON Web Key Set.")
+        keys = {}
+        for jwk in resp.json().get("keys", []):
+            if jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[jwk.get("kid")] = jwt.PyJWK(jwk)
+            except jwt.PyJWKError as ex:
+                logger.warning(f"Skipping unsupported signing key '{jwk.get('kid')}': {ex}")
+        self._keys = keys
+
+    def _expired(self, now: float) -> bool:
+        return self._fetched_at is None or now - self._fetched_at > self.max_age
+
+    def _find(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        if kid:
+            return self._keys.get(kid)
+        # Tokens without key ID are signed with the only published key
+        keys = list(self._keys.values())
+        return keys[0] if len(keys) == 1 else None
+
+    def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        """Return the signing key for a key ID, or the only key without one.
+
+        Cached keys are still served while the key set cannot be fetched.
+        """
+        key = self._find(kid)
+        if key and not self._expired(time.monotonic()):
+            return key
+        with self._lock:
+            key = self._find(kid)
+            now = time.monotonic()
+            if key and not self._expired(now):
+                return key
+            if (self._attempted_at is None
+                    or now - self._attempted_at >= self.min_refetch_interval):
+                self._attempted_at = now
+                try:
+                    self._fetch()
+                    self._fetched_at = now
+                except Exception as ex:  # pylint: disable=broad-exception-caught
+                    if not self._keys:
+                        raise
+                    logger.warning(f"Serving cached signing keys, JWKS fetch failed: {ex}")
+            key = self._find(kid)
+        if not key and not kid:
+            raise AccessHelperException(
+                f"Token has no signing key ID and the key set has {len(self._keys)} keys."
+            )
+        if not key:
+            raise AccessHelperException(f"Signing key '{kid}' not found.")
+        return key
+
+
+_jwks_caches: dict[str, JwksCache] = {}
+_jwks_caches_lock = threading.Lock()
+
+
+def get_jwks_cache(jwks_uri: str) -> JwksCache:
+    """Shared key cache for a JWKS endpoint"""
+    jwks_cache = _jwks_caches.get(jwks_uri)
+    if jwks_cache:
+        return jwks_cache
+    with _jwks_caches_lock:
+        if jwks_uri not in _jwks_caches:
+            _jwks_caches[jwks_uri] = JwksCache(jwks_uri)
+        return _jwks_caches[jwks_uri]
@@ -0,0 +1,161 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Logging setup for development (rich console) and production (JSON) modes"""
+
+import os
+import re
+import sys
+import json
+import queue
+import atexit
+import logging
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Optional
+
+from rich.logging import RichHandler
+from rich.pretty import pretty_repr
+
+LOGGER_NAME = "qbapi_tools"
+MODE_DEVELOPMENT = "development"
+MODE_PRODUCTION = "production"
+REDACTED = "***"
+REDACTED_KEYS = frozenset(key.lower() for key in (
+    "id_token", "access_token", "refresh_token", "client_secret", "assertion",
+    "idToken", "accessToken", "refreshToken", "SecretAccessKey", "SessionToken",
+    "sts:identity_context", "Authorization",
+))
+_JWT_PATTERN = re.compile(r"eyJ[\w-]+\.eyJ[\w-]+\.[\w-]*")
+
+_lock = threading.Lock()
+_listeners: dict[str, QueueListener] = {}
+_modes: dict[str, str] = {}
+
+
+def redact(value: Any) -> Any:
+    """Copy of a value with tokens and secrets masked"""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if str(key).lower() in REDACTED_KEYS else redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, (list, tuple)):
+        return type(value)(redact(item) for item in value)
+    if isinstance(value, str):
+        return _JWT_PATTERN.sub(REDACTED, value)
+    return value
+
+
+class LazyRepr:
+    """Defers redaction and pretty printing until a record is emitted"""
+    __slots__ = ("value", "logger_name")
+
+    def __init__(self, value: Any, logger_name: str = LOGGER_NAME) -> None:
+        self.value = value
+        self.logger_name = logger_name
+
+    def __str__(self) -> str:
+        value = redact(self.value)
+        if _modes.get(self.logger_name) == MODE_PRODUCTION:
+            return json.dumps(value, default=str)
+        return pretty_repr(value)
+
+
+class RedactingFilter(logging.Filter):
+    """Masks tokens found in record message and arguments"""
+    def filter(self, record: logging.LogRecord) -> bool:
+        if isinstance(record.msg, str):
+            record.msg = redact(record.msg)
+        if isinstance(record.args, dict):
+            record.args = redact(record.args)
+        elif record.args:
+            record.args = tuple(
+                arg if isinstance(arg, LazyRepr) else redact(arg)
+                for arg in record.args
+            )
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """Single line JSON log records"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "module": record.module,
+            "line": record.lineno,
+            "thread": record.threadName,
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """Queue handler leaving message formatting to the listener thread"""
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def _stop_listener(name: str) -> None:
+    listener = _listeners.pop(name, None)
+    if listener:
+        listener.stop()
+
+
+def configure_logging(mode: Optional[str] = None, level: Optional[str] = None,
+                      logger_name: str = LOGGER_NAME) -> logging.Logger:
+    """Install a single handler on a logger for the given mode.
+
+    Development mode renders records with rich. Production mode emits
+    JSON lines to stderr through a queue, so callers never block on
+    output and message formatting happens on the listener thread.
+    Tokens and secrets are masked in both modes.
+    """
+    mode = mode if mode else os.environ.get("logging_mode", MODE_DEVELOPMENT)
+    if mode not in (MODE_DEVELOPMENT, MODE_PRODUCTION):
+        raise ValueError(f"Unsupported logging mode '{mode}'.")
+    default_level = "INFO" if mode == MODE_PRODUCTION else "DEBUG"
+    level = level if level else os.environ.get("logging", default_level)
+
+    logger = logging.getLogger(logger_name)
+    with _lock:
+        _stop_listener(logger_name)
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+        if mode == MODE_PRODUCTION:
+            output = logging.StreamHandler(sys.stderr)
+            output.setFormatter(JsonFormatter())
+            output.addFilter(RedactingFilter())
+            log_queue: queue.SimpleQueue = queue.SimpleQueue()
+            listener = QueueListener(log_queue, output, respect_handler_level=True)
+            listener.start()
+            _listeners[logger_name] = listener
+            logger.addHandler(_DeferredQueueHandler(log_queue))
+            logger.propagate = False
+        else:
+            handler = RichHandler(show_time=False, rich_tracebacks=False)
+            handler.addFilter(RedactingFilter())
+            logger.addHandler(handler)
+        _modes[logger_name] = mode
+        logger.setLevel(logging.getLevelName(level))
+    return logger
+
+
+def get_logger(logger_name: str = LOGGER_NAME) -> logging.Logger:
+    """Logger configured once from environment, shared by all modules"""
+    logger = logging.getLogger(logger_name)
+    if logger_name not in _modes:
+        configure_logging(logger_name=logger_name)
+    return logger
+
+
+@atexit.register
+def _flush_listeners() -> None:
+    with _lock:
+        for name in list(_listeners):
+            _stop_listener(name)
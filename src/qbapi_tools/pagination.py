@@ -0,0 +1,105 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""Concurrent page iteration helpers"""
+
+import queue
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, Sequence, TypeVar
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+_SOURCE_DONE = object()
+_PUT_POLL_INTERVAL = 0.1
+
+
+class _PageFailure:
+    """Exception raised by a worker, re-raised by the consumer"""
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+def _put(pages: queue.Queue, item, cancelled: threading.Event) -> bool:
+    """Blocking put that gives up once the consumer went away"""
+    while not cancelled.is_set():
+        try:
+            pages.put(item, timeout=_PUT_POLL_INTERVAL)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def fan_out_pages(sources: Sequence[S], fetch_pages: Callable[[S], Iterator[list[T]]],
+                  max_workers: int, preserve_order: bool = False,
+                  max_pending_pages: int = 2) -> Iterator[T]:
+    """Paginate several sources in parallel and merge their items.
+
+    Each source is paginated by a single worker, so items of a source keep
+    their order. With `preserve_order` all items of a source are yielded
+    before the next source's, otherwise pages are yielded as they arrive.
+    Workers stop fetching while `max_pending_pages` pages per worker are
+    waiting to be consumed, which bounds memory use. Closing the iterator
+    stops the workers after their current request; the first worker
+    error is raised to the consumer.
+    """
+    if not sources:
+        return
+    max_workers = max(1, min(max_workers, len(sources)))
+    cancelled = threading.Event()
+    if preserve_order:
+        queues = [queue.Queue(maxsize=max_pending_pages) for _ in sources]
+    else:
+        shared = queue.Queue(maxsize=max_pending_pages * max_workers)
+        queues = [shared] * len(sources)
+
+    def worker(source: S, pages: queue.Queue) -> None:
+        try:
+            for page in fetch_pages(source):
+                if not _put(pages, page, cancelled):
+                    return
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            _put(pages, _PageFailure(ex), cancelled)
+            return
+        _put(pages, _SOURCE_DONE, cancelled)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="page-fan-out")
+    try:
+        for source, pages in zip(sources, queues):
+            executor.submit(contextvars.copy_context().run, worker, source, pages)
+        if preserve_order:
+            streams = [(pages, 1) for pages in queues]
+        else:
+            streams = [(shared, len(sources))]
+        for pages, pending_sources in streams:
+            while pending_sources:
+                page = pages.get()
+                if page is _SOURCE_DONE:
+                    pending_sources -= 1
+                elif isinstance(page, _PageFailure):
+                    raise page.error
+                else:
+                    yield from page
+    finally:
+        cancelled.set()
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_page_items(pages: Iterator[list[T]], prefetch: int = 0) -> Iterator[T]:
+    """Iterate items of pages, fetching up to `prefetch` pages ahead.
+
+    With `prefetch` above 0 pages are requested and parsed on a background
+    worker while the caller consumes the current page. Errors are raised
+    to the caller, and closing the iterator stops the worker.
+    """
+    if prefetch > 0:
+        yield from fan_out_pages([pages], lambda page_iterator: page_iterator,
+                                 max_workers=1, max_pending_pages=prefetch)
+        return
+    for page in pages:
+        yield from page
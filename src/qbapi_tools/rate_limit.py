@@ -0,0 +1,244 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=logging-fstring-interpolation
+
+"""Adaptive client-side rate limiting shared by service clients"""
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
+
+from pydantic import BaseModel, Field, model_validator
+
+from qbapi_tools.datamodel import RequestPriorityEnum
+from qbapi_tools.log_config import get_logger
+
+logger = get_logger()
+
+THROTTLING_ERROR_CODES = frozenset((
+    "ThrottlingException", "Throttling", "ThrottledException",
+    "TooManyRequestsException", "RequestLimitExceeded", "SlowDown",
+))
+
+
+class OperationLimit(BaseModel):
+    """Token bucket settings for an API operation.
+
+    The fill rate starts at `rate`, is multiplied by `decrease_factor` on
+    each throttling response and grows by `increase` per successful call,
+    within [`min_rate`, `max_rate`]. Background calls leave
+    `background_reserve` of the bucket to interactive calls.
+    """
+    rate: float = Field(gt=0)
+    burst: Optional[float] = Field(default=None, ge=1)
+    min_rate: float = Field(default=0.5, gt=0)
+    max_rate: Optional[float] = Field(default=None, gt=0)
+    increase: float = Field(default=0.05, ge=0)
+    decrease_factor: float = Field(default=0.5, gt=0, lt=1)
+    background_reserve: float = Field(default=0.2, ge=0, lt=1)
+
+    @model_validator(mode="after")
+    def _check_bounds(self) -> "OperationLimit":
+        if self.burst is None:
+            self.burst = max(1.0, self.rate)
+        if self.max_rate is None:
+            self.max_rate = self.rate
+        if not self.min_rate <= self.rate <= self.max_rate:
+            raise ValueError("Expected min_rate <= rate <= max_rate.")
+        return self
+
+
+class OperationRateMetrics(BaseModel):
+    """Current state of an operation's token bucket"""
+    operation: str
+    rate: float
+    tokens: float
+    acquired: int
+    throttles: int
+    waiting_interactive: int
+    waiting_background: int
+    total_wait_seconds: float
+
+
+class _TokenBucket:
+    """Token bucket with adaptive rate and priority aware waiting"""
+    def __init__(self, operation: str, limit: OperationLimit) -> None:
+        self.operation = operation
+        self.limit = limit
+        self.rate = limit.rate
+        self.tokens = limit.burst
+        self.updated = time.monotonic()
+        self.acquired = 0
+        self.throttles = 0
+        self.total_wait = 0.0
+        self.waiting = {priority: 0 for priority in RequestPriorityEnum}
+        self._cond = threading.Condition()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.limit.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def acquire(self, priority: RequestPriorityEnum) -> float:
+        """Take a token, waiting as needed, and return the time waited"""
+        interactive = priority == RequestPriorityEnum.interactive
+        needed = 1.0 if interactive else min(
+            self.limit.burst, 1.0 + self.limit.background_reserve * self.limit.burst
+        )
+        started = time.monotonic()
+        with self._cond:
+            self.waiting[priority] += 1
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    ahead = 0 if interactive else self.waiting[RequestPriorityEnum.interactive]
+                    if not ahead and self.tokens >= needed:
+                        self.tokens -= 1
+                        break
+                    # Waits for refill, or for interactive callers ahead to leave
+                    deficit = needed - self.tokens
+                    self._cond.wait(deficit / self.rate if deficit > 0 else None)
+            finally:
+                self.waiting[priority] -= 1
+                if interactive:
+                    self._cond.notify_all()
+            waited = time.monotonic() - started
+            self.acquired += 1
+            self.total_wait += waited
+        return waited
+
+    def on_throttle(self) -> None:
+        """Multiplicative decrease"""
+        with self._cond:
+            self._refill(time.monotonic())
+            self.rate = max(self.limit.min_rate, self.rate * self.limit.decrease_factor)
+            self.throttles += 1
+
+    def on_success(self) -> None:
+        """Additive increase"""
+        with self._cond:
+            self._refill(time.monotonic())
+            self.rate = min(self.limit.max_rate, self.rate + self.limit.increase)
+            self._cond.notify_all()
+
+    def metrics(self) -> OperationRateMetrics:
+        """Snapshot of the bucket"""
+        with self._cond:
+            self._refill(time.monotonic())
+            return OperationRateMetrics(
+                operation=self.operation,
+                rate=self.rate,
+                tokens=self.tokens,
+                acquired=self.acquired,
+                throttles=self.throttles,
+                waiting_interactive=self.waiting[RequestPriorityEnum.interactive],
+                waiting_background=self.waiting[RequestPriorityEnum.background],
+                total_wait_seconds=self.total_wait,
+            )
+
+
+class RateLimiter:
+    """Per operation token buckets, keyed by API name (eg. "ChatSync").
+
+    Operations without a limit use `default`, or are not limited when it
+    is not set. Interactive calls are served before waiting background
+    calls, and rates adapt to throttling responses.
+    """
+    def __init__(self, limits: Optional[dict[str, OperationLimit]] = None,
+                 default: Optional[OperationLimit] = None) -> None:
+        self.limits = dict(limits) if limits else {}
+        self.default = default
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, operation: str) -> Optional[_TokenBucket]:
+        bucket = self._buckets.get(operation)
+        if bucket:
+            return bucket
+        limit = self.limits.get(operation, self.default)
+        if not limit:
+            return None
+        with self._lock:
+            if operation not in self._buckets:
+                self._buckets[operation] = _TokenBucket(operation, limit)
+            return self._buckets[operation]
+
+    def acquire(self, operation: str,
+                priority: RequestPriorityEnum = RequestPriorityEnum.interactive) -> float:
+        """Wait for a token of an operation, returns the time waited"""
+        bucket = self._bucket(operation)
+        return bucket.acquire(priority) if bucket else 0.0
+
+    def record(self, operation: str, throttled: bool) -> None:
+        """Adapt an operation's rate to a response"""
+        bucket = self._bucket(operation)
+        if not bucket:
+            return
+        if throttled:
+            bucket.on_throttle()
+            logger.debug(f"Throttled '{operation}', rate lowered to {bucket.rate:.2f}/s")
+        else:
+            bucket.on_success()
+
+    def metrics(self) -> dict[str, OperationRateMetrics]:
+        """Current rate, tokens and counters per operation"""
+        return {name: bucket.metrics() for name, bucket in list(self._buckets.items())}
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+_priority: contextvars.ContextVar[Optional[RequestPriorityEnum]] = contextvars.ContextVar(
+    "qbapi_request_priority", default=None
+)
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """Shared rate limiter, None when rate limiting is disabled"""
+    return _rate_limiter
+
+
+def configure_rate_limiter(limiter: Optional[RateLimiter]) -> Optional[RateLimiter]:
+    """Install a shared rate limiter, or disable rate limiting when None"""
+    global _rate_limiter  # pylint: disable=global-statement
+    _rate_limiter = limiter
+    return limiter
+
+
+@contextmanager
+def request_priority(priority: RequestPriorityEnum) -> Iterator[None]:
+    """Override the priority of calls made in a block"""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+def _is_throttled(response: Any) -> bool:
+    http_response, parsed = response
+    if http_response.status_code == 429:
+        return True
+    return parsed.get("Error", {}).get("Code") in THROTTLING_ERROR_CODES
+
+
+def attach_rate_limiter(client: Any, priority: RequestPriorityEnum) -> None:
+    """Route a client's calls through the shared rate limiter.
+
+    Adds a single check per call while rate limiting is disabled.
+    """
+    def before_call(model, **_kwargs) -> None:
+        limiter = _rate_limiter
+        if limiter:
+            limiter.acquire(model.name, _priority.get() or priority)
+
+    def needs_retry(response, operation, **_kwargs) -> None:
+        limiter = _rate_limiter
+        if limiter and response:
+            limiter.record(operation.name, _is_throttled(response))
+
+    service_id = client.meta.service_model.service_id.hyphenize()
+    client.meta.events.register(f"before-call.{service_id}", before_call)
+    client.meta.events.register(f"needs-retry.{service_id}", needs_retry)
@@ -0,0 +1,244 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=logging-fstring-interpolation,broad-exception-caught
+
+"""Conversation retention sweeper for all users of an application.
+
+Users are read from a file (one user ID per line) or enumerated from the
+IAM Identity Center identity store. Users are swept concurrently, each
+with concurrent deleters, and all calls share the client-side rate
+limiter. Finished users are appended to a checkpoint file, so an
+interrupted sweep resumes where it stopped.
+"""
+
+import time
+import argparse
+import threading
+import contextvars
+from pathlib import Path
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
+
+from dateutil import tz
+
+from qbapi_tools.api_helpers import QBusinessAPIHelpers
+from qbapi_tools.client_pool import get_client_cache
+from qbapi_tools.datamodel import (
+    ServiceConfig, UserRetentionResult, RetentionSweepSummary,
+)
+from qbapi_tools.log_config import get_logger
+from qbapi_tools.rate_limit import (
+    OperationLimit, RateLimiter, configure_rate_limiter, get_rate_limiter,
+)
+
+logger = get_logger()
+
+RETENTION_DAYS = 30
+PROGRESS_LOG_INTERVAL = 100
+
+
+def read_user_ids(path: Path) -> Iterator[str]:
+    """User IDs of a file, one per line, skipping blank and # comment lines"""
+    with open(path, encoding="utf-8") as users_file:
+        for line in users_file:
+            user_id = line.strip()
+            if user_id and not user_id.startswith("#"):
+                yield user_id
+
+
+def list_identity_store_user_ids(region_name: Optional[str] = None,
+                                 identity_store_id: Optional[str] = None) -> Iterator[str]:
+    """Primary email (or user name) of each identity store user.
+
+    The identity store of the first IAM Identity Center instance is used
+    when `identity_store_id` is not set.
+    """
+    if not identity_store_id:
+        instances = get_client_cache().get("sso-admin", region_name).list_instances()
+        identity_store_id = instances["Instances"][0]["IdentityStoreId"]
+    paginator = get_client_cache().get("identitystore", region_name).get_paginator("list_users")
+    for page in paginator.paginate(IdentityStoreId=identity_store_id):
+        for user in page["Users"]:
+            emails = user.get("Emails", [])
+            primary = next((email for email in emails if email.get("Primary")),
+                           emails[0] if emails else None)
+            yield primary["Value"] if primary else user["UserName"]
+
+
+class SweepCheckpoint:
+    """Append-only JSON lines file of finished users"""
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self._lock = threading.Lock()
+
+    def load(self) -> dict[str, UserRetentionResult]:
+        """Latest result per user, empty when the file does not exist"""
+        results = {}
+        if self.path.exists():
+            with open(self.path, encoding="utf-8") as checkpoint_file:
+                for line in checkpoint_file:
+                    if line.strip():
+                        result = UserRetentionResult.model_validate_json(line)
+                        results[result.userId] = result
+        return results
+
+    def append(self, result: UserRetentionResult) -> None:
+        """Record a finished user"""
+        with self._lock, open(self.path, "a", encoding="utf-8") as checkpoint_file:
+            checkpoint_file.write(result.model_dump_json() + "\n")
+
+
+class RetentionSweeper:
+    """Deletes conversations older than `age` for every user of an application.
+
+    Up to `user_workers` users are swept at a time, each with
+    `delete_workers` concurrent deleters. With `dry_run` conversations are
+    only listed and counted. Users completed by an earlier run with the
+    same checkpoint and mode are skipped.
+    """
+    def __init__(self, app_id: str, age: timedelta = timedelta(days=RETENTION_DAYS),
+                 service_config: Optional[ServiceConfig] = None,
+                 checkpoint: Optional[SweepCheckpoint] = None,
+                 user_workers: int = 8, delete_workers: int = 4,
+                 dry_run: bool = False) -> None:
+        self.app_id = app_id
+        self.age = age
+        self.checkpoint = checkpoint
+        self.user_workers = user_workers
+        self.delete_workers = delete_workers
+        self.dry_run = dry_run
+        self.helpers = QBusinessAPIHelpers(
+            service_config if service_config else ServiceConfig.preset("bulk_admin")
+        )
+
+    def _count_expired(self, user_id: str) -> UserRetentionResult:
+        expiry_cutoff = datetime.now(tz.tzlocal()) - self.age
+        result = UserRetentionResult(userId=user_id, dryRun=True)
+        for conversation in self.helpers.list_conversations(self.app_id, user_id):
+            if conversation.startTime <= expiry_cutoff:
+                result.expired += 1
+            else:
+                result.skipped += 1
+        return result
+
+    def _purge(self, user_id: str) -> UserRetentionResult:
+        summary = self.helpers.purge_conversations_by_age(
+            self.app_id, user_id, self.age, max_workers=self.delete_workers
+        )
+        return UserRetentionResult(
+            userId=user_id,
+            expired=summary.expired,
+            deleted=len(summary.deleted),
+            skipped=len(summary.skipped),
+            failed=[failure.conversationId for failure in summary.failed],
+            error=summary.listingError
+        )
+
+    def sweep_user(self, user_id: str) -> UserRetentionResult:
+        """Sweep a user, recording errors instead of raising them"""
+        started = time.perf_counter()
+        try:
+            result = self._count_expired(user_id) if self.dry_run else self._purge(user_id)
+        except Exception as ex:
+            logger.warning(f"Retention sweep of '{user_id}' failed: {ex}")
+            result = UserRetentionResult(userId=user_id, dryRun=self.dry_run, error=str(ex))
+        result.elapsedSeconds = time.perf_counter() - started
+        if self.checkpoint:
+            self.checkpoint.append(result)
+        return result
+
+    def sweep(self, user_ids: Iterable[str]) -> RetentionSweepSummary:
+        """Sweep users as they are read from `user_ids`"""
+        done = {
+            user_id for user_id, result in
+            (self.checkpoint.load() if self.checkpoint else {}).items()
+            if result.complete and result.dryRun == self.dry_run
+        }
+        summary = RetentionSweepSummary(applicationId=self.app_id, dryRun=self.dry_run)
+        lock = threading.Lock()
+        # Bounds users read ahead of the workers
+        slots = threading.BoundedSemaphore(self.user_workers * 2)
+        started = time.perf_counter()
+
+        def sweep_one(user_id: str) -> None:
+            try:
+                result = self.sweep_user(user_id)
+            finally:
+                slots.release()
+            with lock:
+                summary.users += 1
+                summary.expired += result.expired
+                summary.deleted += result.deleted
+                summary.failedConversations += len(result.failed)
+                if not result.complete:
+                    summary.failedUsers.append(user_id)
+                if summary.users % PROGRESS_LOG_INTERVAL == 0:
+                    logger.info(
+                        f"Retention sweep: {summary.users} users, {summary.expired} expired, "
+                        f"{summary.deleted} deleted in {time.perf_counter() - started:.0f}s"
+                    )
+
+        with ThreadPoolExecutor(max_workers=self.user_workers,
+                                thread_name_prefix="retention-sweep") as executor:
+            for user_id in user_ids:
+                if user_id in done:
+                    summary.resumedUsers += 1
+                    continue
+                slots.acquire()
+                executor.submit(contextvars.copy_context().run, sweep_one, user_id)
+        summary.elapsedSeconds = time.perf_counter() - started
+        return summary
+
+
+def main():
+    """Run a retention sweep from the command line"""
+    parser = argparse.ArgumentParser(description="Q Business conversation retention sweeper")
+    parser.add_argument("--app-id", required=True, help="Q Business application ID")
+    parser.add_argument("--region", help="AWS region name")
+    users = parser.add_mutually_exclusive_group(required=True)
+    users.add_argument("--users-file", type=Path, help="file with one user ID per line")
+    users.add_argument("--identity-store", nargs="?", const="", metavar="IDENTITY_STORE_ID",
+                       help="enumerate IAM Identity Center users, "
+                            "of the first instance when no ID is given")
+    parser.add_argument("--days", type=int, default=RETENTION_DAYS,
+                        help="delete conversations older than this")
+    parser.add_argument("--checkpoint", type=Path,
+                        help="JSON lines file of finished users, used to resume")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="count expired conversations without deleting them")
+    parser.add_argument("--user-workers", type=int, default=8,
+                        help="users swept concurrently")
+    parser.add_argument("--delete-workers", type=int, default=4,
+                        help="concurrent deletes per user")
+    parser.add_argument("--list-rate", type=float, default=10,
+                        help="ListConversations calls per second, across users")
+    parser.add_argument("--delete-rate", type=float, default=20,
+                        help="DeleteConversation calls per second, across users")
+    args = parser.parse_args()
+
+    if not get_rate_limiter():
+        configure_rate_limiter(RateLimiter({
+            "ListConversations": OperationLimit(rate=args.list_rate),
+            "DeleteConversation": OperationLimit(rate=args.delete_rate),
+        }))
+    if args.users_file:
+        user_ids = read_user_ids(args.users_file)
+    else:
+        user_ids = list_identity_store_user_ids(args.region, args.identity_store or None)
+    sweeper = RetentionSweeper(
+        app_id=args.app_id,
+        age=timedelta(days=args.days),
+        service_config=ServiceConfig.preset("bulk_admin", region_name=args.region),
+        checkpoint=SweepCheckpoint(args.checkpoint) if args.checkpoint else None,
+        user_workers=args.user_workers,
+        delete_workers=args.delete_workers,
+        dry_run=args.dry_run
+    )
+    summary = sweeper.sweep(user_ids)
+    print(summary.model_dump_json(indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+# pylint: disable=logging-fstring-interpolation
+
+"""Lightweight timing spans for the login and chat flow"""
+
+import os
+import time
+import queue
+import secrets
+import inspect
+import functools
+import threading
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Protocol
+
+from pydantic import BaseModel, Field
+
+from qbapi_tools.log_config import get_logger
+from qbapi_tools.http_pool import get_http_pool
+
+logger = get_logger()
+
+OUTCOME_OK = "ok"
+OUTCOME_ERROR = "error"
+
+
+class SpanRecord(BaseModel):
+    """Finished span"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_span_id: Optional[str] = None
+    start_time_ns: int
+    end_time_ns: int
+    outcome: str = OUTCOME_OK
+    error_class: Optional[str] = None
+    attributes: dict[str, Any] = Field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        """Span duration in milliseconds"""
+        return (self.end_time_ns - self.start_time_ns) / 1e6
+
+
+class SpanExporter(Protocol):
+    """Receives finished spans"""
+    def export(self, span: SpanRecord) -> None:
+        """Handle a finished span"""
+
+
+class Span:
+    """Span in progress, attributes may be added until it ends"""
+    __slots__ = ("name", "trace_id", "span_id", "parent_span_id",
+                 "start_time_ns", "attributes")
+
+    def __init__(self, name: str, parent: Optional["Span"],
+                 attributes: dict[str, Any]) -> None:
+        self.name = name
+        self.trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.parent_span_id = parent.span_id if parent else None
+        self.start_time_ns = time.time_ns()
+        self.attributes = attributes
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        """Attach an attribute to the span"""
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> SpanRecord:
+        """Build the finished span record"""
+        record = SpanRecord(
+            name=self.name,
+            trace_id=self.trace_id,
+            span_id=self.span_id,
+            parent_span_id=self.parent_span_id,
+            start_time_ns=self.start_time_ns,
+            end_time_ns=time.time_ns(),
+            attributes=self.attributes,
+        )
+        if error is not None:
+            record.outcome = OUTCOME_ERROR
+            record.error_class = type(error).__name__
+            response = getattr(error, "response", None)
+            if isinstance(response, dict) and response.get("Error", {}).get("Code"):
+                record.attributes["error_code"] = response["Error"]["Code"]
+        return record
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "qbapi_current_span", default=None
+)
+
+
+class Tracer:
+    """Creates spans and hands finished spans to exporters"""
+    def __init__(self, exporters: Optional[list[SpanExporter]] = None) -> None:
+        self.exporters = list(exporters) if exporters else []
+
+    @property
+    def enabled(self) -> bool:
+        """True when at least one exporter is configured"""
+        return bool(self.exporters)
+
+    def _export(self, record: SpanRecord) -> None:
+        for exporter in self.exporters:
+            try:
+                exporter.export(record)
+            except Exception as ex:  # pylint: disable=broad-exception-caught
+                logger.warning(f"Span export failed: {ex}")
+
+    @contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Optional[Span]]:
+        """Time a block as a child of the current span"""
+        if not self.enabled:
+            yield None
+            return
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as ex:
+            self._export(span.finish(ex))
+            raise
+        else:
+            self._export(span.finish())
+        finally:
+            _current_span.reset(token)
+
+    def trace_iterator(self, name: str, attributes: dict[str, Any],
+                       iterator: Iterator) -> Iterator:
+        """Time an iterator from first item until exhausted or closed"""
+        span = Span(name, _current_span.get(), attributes)
+        items = 0
+        try:
+            for item in iterator:
+                items += 1
+                yield item
+        except BaseException as ex:
+            span.set_attribute("items", items)
+            if isinstance(ex, GeneratorExit):
+                self._export(span.finish())
+            else:
+                self._export(span.finish(ex))
+            raise
+        span.set_attribute("items", items)
+        self._export(span.finish())
+
+
+_tracer = Tracer()
+
+
+def get_tracer() -> Tracer:
+    """Current process tracer"""
+    return _tracer
+
+
+def set_tracer(tracer: Optional[Tracer]) -> Tracer:
+    """Install a tracer, or disable tracing when None"""
+    global _tracer  # pylint: disable=global-statement
+    _tracer = tracer if tracer else Tracer()
+    return _tracer
+
+
+def traced(name: str, **attributes) -> Callable:
+    """Record a span per call. Adds a single check when tracing is disabled."""
+    def decorator(func: Callable) -> Callable:
+        if inspect.isgeneratorfunction(func):
+            @functools.wraps(func)
+            def iter_wrapper(*args, **kwargs):
+                tracer = _tracer
+                if not tracer.exporters:
+                    return func(*args, **kwargs)
+                return tracer.trace_iterator(name, dict(attributes), func(*args, **kwargs))
+            return iter_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if not tracer.exporters:
+                return func(*args, **kwargs)
+            with tracer.span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+class InMemoryCollector:
+    """Keeps the most recent finished spans in memory"""
+    def __init__(self, max_spans: int = 10000) -> None:
+        self._spans: deque[SpanRecord] = deque(maxlen=max_spans)
+
+    def export(self, span: SpanRecord) -> None:
+        """Store a finished span"""
+        self._spans.append(span)
+
+    def spans(self, name: Optional[str] = None) -> list[SpanRecord]:
+        """Collected spans, optionally filtered by name"""
+        return [span for span in list(self._spans) if name is None or span.name == name]
+
+    def clear(self) -> None:
+        """Drop collected spans"""
+        self._spans.clear()
+
+
+def _otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+class OtlpHttpExporter:
+    """Batches spans and posts them as OTLP/HTTP JSON from a background thread"""
+    def __init__(self, endpoint: Optional[str] = None, service_name: str = "qbapi_tools",
+                 headers: Optional[dict[str, str]] = None, max_batch: int = 256,
+                 flush_interval: float = 5, max_queue: int = 8192) -> None:
+        self.endpoint = endpoint if endpoint else os.environ.get(
+            "OTEL_EXPORTER_OTLP_TRACES_ENDPOINT", "http://localhost:4318/v1/traces"
+        )
+        self.service_name = service_name
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stopped = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, span: SpanRecord) -> None:
+        """Queue a finished span, dropping it when the queue is full"""
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            logger.warning("OTLP export queue full, dropping span.")
+
+    def _payload(self, spans: list[SpanRecord]) -> dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [
+                {"key": "service.name", "value": {"stringValue": self.service_name}}
+            ]},
+            "scopeSpans": [{
+                "scope": {"name": "qbapi_tools"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_span_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_time_ns),
+                    "endTimeUnixNano": str(span.end_time_ns),
+                    "attributes": [
+                        {"key": key, "value": _otlp_value(value)}
+                        for key, value in {
+                            **span.attributes,
+                            **({"error.type": span.error_class} if span.error_class else {}),
+                        }.items()
+                    ],
+                    "status": {"code": 2 if span.outcome == OUTCOME_ERROR else 1},
+                } for span in spans],
+            }],
+        }]}
+
+    def _send(self, spans: list[SpanRecord]) -> None:
+        try:
+            resp = get_http_pool().request(
+                "POST", self.endpoint, json=self._payload(spans), headers=self.headers
+            )
+            if resp.status_code >= 300:
+                logger.warning(f"OTLP export failed with HTTP {resp.status_code}.")
+        except Exception as ex:  # pylint: disable=broad-exception-caught
+            logger.warning(f"OTLP export failed: {ex}")
+
+    def _drain(self) -> list[SpanRecord]:
+        spans = []
+        while len(spans) < self.max_batch:
+            try:
+                spans.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return spans
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._stopped.wait(self.flush_interval)
+            spans = self._drain()
+            while spans:
+                self._send(spans)
+                spans = self._drain()
+
+    def shutdown(self) -> None:
+        """Flush queued spans and stop the worker"""
+        self._stopped.set()
+        self._worker.join()
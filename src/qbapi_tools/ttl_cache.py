@@ -0,0 +1,60 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""In-process cache of values expiring after a fixed time"""
+
+import time
+import threading
+from typing import Any, Callable, Hashable, Optional
+
+
+class TtlCache:
+    """Thread-safe cache of values expiring `ttl` seconds after they are stored.
+
+    Once `max_entries` is reached the oldest entry is dropped.
+    """
+    def __init__(self, ttl: float = 300, max_entries: int = 1024) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: dict[Hashable, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Cached value, None when missing or expired"""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            with self._lock:
+                if self._entries.get(key) is entry:
+                    del self._entries[key]
+            return None
+        return value
+
+    def put(self, key: Hashable, value: Any) -> Any:
+        """Store a value"""
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            while len(self._entries) > self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        return value
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Cached value, loaded and stored when missing or expired"""
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, loader())
+        return value
+
+    def invalidate(self, match: Callable[[Hashable], bool]) -> None:
+        """Drop entries whose key matches"""
+        with self._lock:
+            for key in [key for key in self._entries if match(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
@@ -18,13 +18,13 @@
 import os
 import random
 import string
-import logging
 import json
+import threading
 from pathlib import Path
+from typing import Callable
 
 import requests
 from dotenv import dotenv_values
-from rich.logging import RichHandler
 from flask import Flask, render_template, redirect, request, url_for
 from flask_login import (
     LoginManager,
@@ -37,44 +37,85 @@ from flask_login import (
 from user import User
 from qbapi_tools.api_helpers import QBusinessAPIHelpers
 from qbapi_tools.access_helpers import (
-    get_oidc_config,
+    OidcConfigCache,
+    OidcData,
+    configure_oidc_config_cache,
     get_oidc_id_token,
+    refresh_oidc_id_token,
     get_idc_sts_id_context,
     get_sts_credential,
+    warm_up_token_exchange_clients,
 )
+from qbapi_tools.broker import CredentialBrokerClient
+from qbapi_tools.client_pool import get_service_client_pool
+from qbapi_tools.credentials import CredentialManager
+from qbapi_tools.hedging import HedgingPolicy
+from qbapi_tools.log_config import get_logger
+from qbapi_tools.tracing import OtlpHttpExporter, Tracer, set_tracer, traced
 from qbapi_tools.exception import (
     AccessHelperException,
+    CredentialRefreshException,
 )
 from qbapi_tools.datamodel import (
     ServiceConfig, ChatMode
 )
 
-logger = logging.getLogger("qbapi_demo")
-logger.addHandler(RichHandler(show_time=False, rich_tracebacks=True))
-logger.setLevel(logging.getLevelName(os.environ.get('logging', 'DEBUG')))
+logger = get_logger("qbapi_demo")
 
 config = {
     **dotenv_values(dotenv_path=Path('./webapp/config/.env').absolute()),
     # **os.environ  # override loaded values with system env variables
 }
-oidc_config = get_oidc_config(config["issuer_url"])
+# Discovery document is loaded lazily on first use and cached in memory and
+# on disk, so workers start without a round-trip to the identity provider
+oidc_config_cache = configure_oidc_config_cache(
+    OidcConfigCache(cache_dir=config.get("oidc_cache_dir"))
+)
+# Verify identity token signatures using the provider's cached signing keys
+verify_issuer_url = (
+    config["issuer_url"]
+    if config.get("verify_id_token", "true").lower() != "false" else None
+)
 region_name = config.get(
     "region_name",
     os.environ.get('AWS_DEFAULT_REGION', 'us-east-1')
 )
+chat_service_config = ServiceConfig.preset("interactive_chat", region_name=region_name)
+# Opt-in second attempt for read calls slower than their p95
+hedging_policy = HedgingPolicy() if config.get("hedge_reads", "false").lower() == "true" else None
+# Export per step timing spans when an OTLP/HTTP traces endpoint is configured
+if config.get("otlp_traces_endpoint"):
+    set_tracer(Tracer([OtlpHttpExporter(
+        endpoint=config["otlp_traces_endpoint"],
+        service_name="qbapi_demo"
+    )]))
+# Load sso-oidc/STS service models off the request path
+threading.Thread(
+    target=warm_up_token_exchange_clients,
+    args=(region_name,),
+    daemon=True
+).start()
 
 app = Flask(__name__)
 
 # Random hash is only used to generate unique values,
 # collisions are acceptable and "data" is not
-# coming from user-generated input
-app.config.update({'SECRET_KEY': ''.join(random.choices(
+# coming from user-generated input.
+# Multiple workers must share 'secret_key' to read each other's sessions.
+app.config.update({'SECRET_KEY': config.get("secret_key") or ''.join(random.choices(
     string.ascii_uppercase + string.ascii_lowercase + string.digits, k=32
 ))})  # nosec
 login_manager = LoginManager()
 login_manager.init_app(app)
 
+# Workers share credentials through the broker when its socket is configured
+broker_client = (
+    CredentialBrokerClient(config["credential_broker_socket"])
+    if config.get("credential_broker_socket") else None
+)
+
 APP_STATE = 'ApplicationState'
+CONVERSATIONS_PAGE_SIZE = 25
 # Random hash is only used to generate unique values,
 # collisions are acceptable and "data" is not
 # coming from user-generated input
@@ -83,10 +124,72 @@ NONCE = ('Sample' + ''.join(random.choices(
 )))  # nosec
 
 
+def get_oidc_endpoint(name: str) -> str:
+    """Retrieve an endpoint from the cached OIDC configuration"""
+    return oidc_config_cache.get(config["issuer_url"])[name]
+
+
+def credential_refresher(oidc_data: OidcData) -> Callable[[], dict]:
+    """Build a callback renewing STS credentials with the IdP refresh token"""
+    tokens = {"refresh_token": oidc_data.refresh_token}
+
+    def refresh() -> dict:
+        if not tokens["refresh_token"]:
+            raise CredentialRefreshException(
+                "Identity provider did not issue a refresh token. Sign-in again."
+            )
+        refreshed = refresh_oidc_id_token(
+            refresh_token=tokens["refresh_token"],
+            token_uri=get_oidc_endpoint("token_endpoint"),
+            client_id=config["client_id"],
+            client_secret=config["client_secret"],
+            issuer_url=verify_issuer_url
+        )
+        tokens["refresh_token"] = refreshed.refresh_token
+        idc_sts_context = get_idc_sts_id_context(
+            config["idc_provider_apl_arn"],
+            refreshed.id_token,
+            region_name
+        )
+        return get_sts_credential(
+            config["qb_sts_role"], idc_sts_context,
+            region_name
+        )
+    return refresh
+
+
+def broker_refresher(user_id: str) -> Callable[[], dict]:
+    """Build a callback fetching renewed STS credentials from the broker"""
+    def refresh() -> dict:
+        cached = broker_client.get(user_id)
+        if not cached:
+            raise CredentialRefreshException("Credential not found in broker. Sign-in again.")
+        return cached.credential
+    return refresh
+
+
 @login_manager.user_loader
 def load_user(user_id):
     """user information loader"""
-    return User.get(user_id)
+    user = User.get(user_id)
+    if not user and broker_client:
+        # Signed-in on another worker
+        try:
+            cached = broker_client.get(user_id)
+        except AccessHelperException as ex:
+            logger.warning(f"Credential broker unavailable, cannot load user: {ex}")
+            return None
+        if cached:
+            user = User.create(
+                user_id=user_id,
+                name=cached.email,
+                email=cached.email,
+                credential=CredentialManager(
+                    refresh=broker_refresher(user_id),
+                    credential=cached.credential
+                )
+            )
+    return user
 
 
 @app.route("/")
@@ -96,6 +199,7 @@ def home():
 
 
 @app.route("/login")
+@traced("webapp.login", step=1)
 def login():
     """Sign-on user with OAuth provider"""
     # ------------------------------------------------
@@ -104,7 +208,7 @@ def login():
     query_params = {
         'client_id': config["client_id"],
         'redirect_uri': f'http://{config["app_domain"]}/authorization-code/callback',
-        'scope': "openid email profile",
+        'scope': config.get("oidc_scope", "openid email profile"),
         'state': APP_STATE,
         'nonce': NONCE,
         'response_type': 'code',
@@ -112,7 +216,11 @@ def login():
     }
 
     # build request_uri
-    base_url = oidc_config["authorization_endpoint"]
+    try:
+        base_url = get_oidc_endpoint("authorization_endpoint")
+    except Exception as ex:
+        logger.exception(ex.args[0])
+        return "Identity provider unavailable", 503
     query_params = requests.compat.urlencode(query_params)
     request_uri = f"{base_url}?{query_params}"
     logger.debug(request_uri)
@@ -120,6 +228,7 @@ def login():
 
 
 @app.route("/authorization-code/callback")
+@traced("webapp.callback")
 def callback():
     """Okta SSO callback url"""
     code = request.args.get("code")
@@ -132,34 +241,53 @@ def callback():
         odic_data = get_oidc_id_token(
             base_url=request.base_url,
             code=code,
-            token_uri=oidc_config["token_endpoint"],
+            token_uri=get_oidc_endpoint("token_endpoint"),
             client_id=config["client_id"],
-            client_secret=config["client_secret"]
-        )
-        # ------------------------------------------------
-        # | STEP (3): Get IDC STS context token          |
-        # ------------------------------------------------
-        idc_sts_context = get_idc_sts_id_context(
-            config["idc_provider_apl_arn"],
-            odic_data.id_token,
-            region_name
-        )
-        # ------------------------------------------------
-        # | STEP (4): Get STS temporary credential       |
-        # ------------------------------------------------
-        credential = get_sts_credential(
-            config["qb_sts_role"], idc_sts_context,
-            region_name
+            client_secret=config["client_secret"],
+            issuer_url=verify_issuer_url
         )
+        if broker_client:
+            # ------------------------------------------------
+            # | STEP (3, 4): Broker exchanges token once     |
+            # ------------------------------------------------
+            credential_manager = CredentialManager(
+                refresh=broker_refresher(odic_data.jwt_sub),
+                credential=broker_client.exchange(odic_data.jwt_sub, odic_data)
+            )
+        else:
+            # ------------------------------------------------
+            # | STEP (3): Get IDC STS context token          |
+            # ------------------------------------------------
+            idc_sts_context = get_idc_sts_id_context(
+                config["idc_provider_apl_arn"],
+                odic_data.id_token,
+                region_name
+            )
+            # ------------------------------------------------
+            # | STEP (4): Get STS temporary credential       |
+            # ------------------------------------------------
+            credential = get_sts_credential(
+                config["qb_sts_role"], idc_sts_context,
+                region_name
+            )
+            credential_manager = CredentialManager(
+                refresh=credential_refresher(odic_data),
+                credential=credential
+            )
         # Authorization flow successful
         # Cache user info and credentials in user store
         user = User.get(odic_data.jwt_sub)
-        if not user:
+        if user:
+            # Replace credentials kept from a previous sign-in
+            if user.credential:
+                get_service_client_pool().discard(user.credential)
+            user.credential = credential_manager
+        else:
             user = User.create(
                 user_id=odic_data.jwt_sub,
                 name=odic_data.jwt_email,
                 email=odic_data.jwt_email,
-                credential=credential
+                credential=credential_manager
             )
         login_user(user)
         return redirect(url_for("chat"))
@@ -171,6 +299,17 @@ def callback():
         return "Internal error", 500
 
 
+@app.errorhandler(CredentialRefreshException)
+def credential_expired(ex):
+    """Sign-in again when credentials can no longer be refreshed"""
+    logger.warning(ex.args[0])
+    logout_user()
+    if request.accept_mimetypes.best == "application/json":
+        # Page scripts redirect to the login URL
+        return json.dumps({'status': "fail", 'login': url_for("login")}), 401
+    return redirect(url_for("login"))
+
+
 @app.route("/chat", methods=['GET'])
 @login_required
 def chat():
@@ -183,6 +322,7 @@ def chat():
 
 @app.route('/answer', methods=['POST'])
 @login_required
+@traced("webapp.answer")
 def get_answer():
     """Invoke Q Business Chat API to get answer"""
     answer = "Sorry, an error occurred while getting the answer."
@@ -195,8 +335,9 @@ def get_answer():
         # | STEP (5): Use temp credentials to call Q Business APIs |
         # ----------------------------------------------------------
         q_api_helper = QBusinessAPIHelpers(
-            service_config=ServiceConfig(region_name=region_name),
+            service_config=chat_service_config,
             credentials=current_user.credential,
+            hedging=hedging_policy
         )
         chat_params = {
             "message": data['question'],
@@ -209,6 +350,8 @@ def get_answer():
         resp = q_api_helper.chat_sync_ttp(**chat_params).model_dump()
         logger.debug(resp)
         return json.dumps(resp)
+    except CredentialRefreshException:
+        raise
     except Exception as ex:
         logger.error(ex)
     return json.dumps({'systemMessage': answer})
@@ -216,26 +359,61 @@ def get_answer():
 
 @app.route("/conversations", methods=['GET'])
 @login_required
+@traced("webapp.conversations")
 def conversations():
     """Generate conversations page"""
     # ----------------------------------------------------------
     # | STEP (5): Use temp credentials to call Q Business APIs |
     # ----------------------------------------------------------
     q_api_helper = QBusinessAPIHelpers(
-        service_config=ServiceConfig(region_name=region_name),
-        credentials=current_user.credential
+        service_config=chat_service_config,
+        credentials=current_user.credential,
+        hedging=hedging_policy
     )
-    user_conversations = list(q_api_helper.list_conversations(config["qb_apl_id"]))
-    logger.debug(user_conversations)
+    # First page only, later pages are loaded on scroll from /conversations/page
+    page = q_api_helper.list_conversations_page(
+        config["qb_apl_id"],
+        page_size=CONVERSATIONS_PAGE_SIZE
+    )
+    logger.debug(page)
     return render_template(
         "conversations.html",
         user=current_user,
-        conversations=user_conversations
+        conversations=page.conversations,
+        next_token=page.nextToken
     )
 
 
+@app.route("/conversations/page", methods=['GET'])
+@login_required
+@traced("webapp.conversations_page")
+def conversations_page():
+    """Next page of conversations as JSON"""
+    next_token = request.args.get("nextToken")
+    if not next_token:
+        return json.dumps({'conversations': [], 'nextToken': None})
+    try:
+        q_api_helper = QBusinessAPIHelpers(
+            service_config=chat_service_config,
+            credentials=current_user.credential,
+            hedging=hedging_policy
+        )
+        page = q_api_helper.list_conversations_page(
+            config["qb_apl_id"],
+            page_size=CONVERSATIONS_PAGE_SIZE,
+            next_token=next_token
+        )
+        return page.model_dump_json()
+    except CredentialRefreshException:
+        raise
+    except Exception as ex:
+        logger.error(ex)
+    return json.dumps({'status': "fail"}), 500
+
+
 @app.route("/delete_chat", methods=['POST'])
 @login_required
+@traced("webapp.delete_chat")
 def delete_conversation():
     """Delete conversation"""
     status = "fail"
@@ -248,15 +426,18 @@ def delete_conversation():
             logger.error("Missing conversation ID.")
             return json.dumps({'status': status})
         q_api_helper = QBusinessAPIHelpers(
-            service_config=ServiceConfig(region_name=region_name),
-            credentials=current_user.credential
+            service_config=chat_service_config,
+            credentials=current_user.credential,
+            hedging=hedging_policy
         )
         resp = q_api_helper.delete_conversation(
             conversation_id=data["conversationId"],
             app_id=config["qb_apl_id"]
         )
         logger.debug(resp)
-        status = "success"
+        status = "success" if resp else "fail"
+    except CredentialRefreshException:
+        raise
     except Exception as ex:
         logger.error(ex)
     return json.dumps({'status': status})
@@ -273,7 +454,14 @@ def profile():
 @login_required
 def logout():
     """Sign-out user"""
-    User.delete(current_user)
+    if broker_client:
+        try:
+            broker_client.evict(current_user.id)
+        except AccessHelperException as ex:
+            logger.warning(f"Credential broker unavailable, cannot evict user: {ex}")
+    if current_user.credential:
+        get_service_client_pool().discard(current_user.credential)
+    User.delete(current_user.id)
     logout_user()
     return redirect(url_for("home"))
 
@@ -3,8 +3,9 @@
 
 """Simulates user database"""
 
-from typing import Dict, Optional, Iterable
+from typing import Optional, Iterable
 from flask_login import UserMixin
+from qbapi_tools.credentials import CredentialManager
 
 
 # Simulate user database
@@ -16,7 +17,7 @@ class User(UserMixin):
     """Custom User class."""
 
     def __init__(self, id_: str, name: str, email: str,
-                 credential: Optional[Dict[str, str]]):
+                 credential: Optional[CredentialManager]):
         self.id = id_
         self.name = name
         self.email = email
@@ -29,7 +30,7 @@ class User(UserMixin):
 
     @staticmethod
     def create(user_id: str, name: str, email: str,
-               credential: Optional[Dict[str, str]]) -> 'User':
+               credential: Optional[CredentialManager]) -> 'User':
         """create and store user data"""
         USERS_DB[user_id] = User(user_id, name, email, credential)
         return USERS_DB[user_id]